@@ -0,0 +1,65 @@
+"""create the core tables: roles, users, patients, audit_logs
+
+Revision ID: 0000_core_tables
+Revises:
+Create Date: 2026-10-18 00:00:00.000000
+
+These tables used to be created by Base.metadata.create_all when app.main was
+imported; the schema is now managed by Alembic alone, so a fresh database needs
+them before 0001. Databases that already went through 0001 never run this.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0000_core_tables'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'roles',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('role_name', sa.String(), nullable=True),
+    )
+    op.create_index('ix_roles_id', 'roles', ['id'])
+    op.create_index('ix_roles_role_name', 'roles', ['role_name'], unique=True)
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=True),
+        sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id'), nullable=True),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'patients',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('medical_history', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_patients_id', 'patients', ['id'])
+
+    op.create_table(
+        'audit_logs',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('action', sa.String(), nullable=True),
+        sa.Column('resource_id', sa.String(), nullable=True),
+        sa.Column('ip_address', sa.String(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'])
+
+
+def downgrade():
+    op.drop_table('audit_logs')
+    op.drop_table('patients')
+    op.drop_table('users')
+    op.drop_table('roles')
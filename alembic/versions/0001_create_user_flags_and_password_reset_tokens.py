@@ -1,7 +1,7 @@
 """create user_flags and password_reset_tokens tables
 
 Revision ID: 0001_create_user_flags_and_password_reset_tokens
-Revises: 
+Revises: 0000_core_tables
 Create Date: 2026-01-06 00:00:00.000000
 """
 from alembic import op
@@ -9,7 +9,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '0001_create_user_flags_and_password_reset_tokens'
-down_revision = None
+down_revision = '0000_core_tables'
 branch_labels = None
 depends_on = None
 
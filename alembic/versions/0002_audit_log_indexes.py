@@ -0,0 +1,32 @@
+"""add audit_logs indexes for keyset pagination and filters
+
+Revision ID: 0002_audit_log_indexes
+Revises: 0001_create_user_flags_and_password_reset_tokens
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0002_audit_log_indexes'
+down_revision = '0001_create_user_flags_and_password_reset_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (timestamp, id) serves the unfiltered newest-first listing and its keyset cursor;
+    # each filter column leads its own composite so filtered pages are index range scans.
+    op.create_index('ix_audit_logs_timestamp_id', 'audit_logs', ['timestamp', 'id'])
+    op.create_index('ix_audit_logs_user_id_timestamp', 'audit_logs', ['user_id', 'timestamp', 'id'])
+    op.create_index('ix_audit_logs_resource_id_timestamp', 'audit_logs', ['resource_id', 'timestamp', 'id'])
+    op.create_index('ix_audit_logs_ip_address_timestamp', 'audit_logs', ['ip_address', 'timestamp', 'id'])
+    # Prefix (LIKE 'ACTION%') lookups on action
+    op.create_index('ix_audit_logs_action_prefix', 'audit_logs', ['action'], postgresql_ops={'action': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_audit_logs_action_prefix', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_ip_address_timestamp', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_resource_id_timestamp', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_user_id_timestamp', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_timestamp_id', table_name='audit_logs')
@@ -0,0 +1,121 @@
+"""partition audit_logs by month on timestamp
+
+Revision ID: 0003_partition_audit_logs
+Revises: 0002_audit_log_indexes
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0003_partition_audit_logs'
+down_revision = '0002_audit_log_indexes'
+branch_labels = None
+depends_on = None
+
+AUDIT_INDEXES = [
+    ('ix_audit_logs_id', '(id)'),
+    ('ix_audit_logs_timestamp_id', '("timestamp", id)'),
+    ('ix_audit_logs_user_id_timestamp', '(user_id, "timestamp", id)'),
+    ('ix_audit_logs_resource_id_timestamp', '(resource_id, "timestamp", id)'),
+    ('ix_audit_logs_ip_address_timestamp', '(ip_address, "timestamp", id)'),
+    ('ix_audit_logs_action_prefix', '(action varchar_pattern_ops)'),
+]
+
+# Creates monthly partitions audit_logs_pYYYYMM from `from_month` (default: this
+# month) through `months_ahead` months after the current month. Idempotent; called
+# by the maintenance tooling (app/crud/audit_partitions.py) to stay ahead of time.
+ENSURE_PARTITIONS_FN = """
+CREATE OR REPLACE FUNCTION audit_logs_ensure_partitions(months_ahead integer DEFAULT 3, from_month date DEFAULT NULL)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    this_month date := date_trunc('month', now() AT TIME ZONE 'utc')::date;
+    m date := date_trunc('month', coalesce(from_month, this_month))::date;
+    last_month date := (this_month + make_interval(months => months_ahead))::date;
+    part text;
+    created integer := 0;
+BEGIN
+    WHILE m <= last_month LOOP
+        part := format('audit_logs_p%s', to_char(m, 'YYYYMM'));
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                part, m, (m + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END $$;
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # Declarative partitioning is Postgres-only; other backends keep the plain table.
+        return
+
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_legacy')
+    op.execute('ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey')
+    for name, _ in AUDIT_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    # The partition key must be part of the primary key, and may not be NULL.
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id integer NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            user_id integer REFERENCES users(id),
+            action varchar,
+            resource_id varchar,
+            ip_address varchar,
+            "timestamp" timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    # Keep the sequence alive when the legacy table is dropped
+    op.execute('ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id')
+    op.execute(ENSURE_PARTITIONS_FN)
+    # Catch-all for rows outside every monthly range (e.g. clock skew); should stay empty
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+    op.execute("""
+        SELECT audit_logs_ensure_partitions(
+            3, (SELECT min("timestamp")::date FROM audit_logs_legacy)
+        )
+    """)
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, resource_id, ip_address, "timestamp")
+        SELECT id, user_id, action, resource_id, ip_address, coalesce("timestamp", now() AT TIME ZONE 'utc')
+        FROM audit_logs_legacy
+    """)
+    op.execute('DROP TABLE audit_logs_legacy')
+
+    # Indexes on the parent cascade to every current and future partition
+    for name, cols in AUDIT_INDEXES:
+        op.execute(f'CREATE INDEX {name} ON audit_logs {cols}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        CREATE TABLE audit_logs_plain (
+            id integer NOT NULL DEFAULT nextval('audit_logs_id_seq') PRIMARY KEY,
+            user_id integer REFERENCES users(id),
+            action varchar,
+            resource_id varchar,
+            ip_address varchar,
+            "timestamp" timestamp
+        )
+    """)
+    op.execute("""
+        INSERT INTO audit_logs_plain (id, user_id, action, resource_id, ip_address, "timestamp")
+        SELECT id, user_id, action, resource_id, ip_address, "timestamp" FROM audit_logs
+    """)
+    op.execute('ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs_plain.id')
+    op.execute('DROP TABLE audit_logs CASCADE')
+    op.execute('DROP FUNCTION IF EXISTS audit_logs_ensure_partitions(integer, date)')
+    op.execute('ALTER TABLE audit_logs_plain RENAME TO audit_logs')
+    op.execute('ALTER TABLE audit_logs RENAME CONSTRAINT audit_logs_plain_pkey TO audit_logs_pkey')
+    for name, cols in AUDIT_INDEXES:
+        op.execute(f'CREATE INDEX {name} ON audit_logs {cols}')
@@ -0,0 +1,38 @@
+"""add patient name search indexes
+
+Revision ID: 0004_patient_name_search
+Revises: 0003_partition_audit_logs
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0004_patient_name_search'
+down_revision = '0003_partition_audit_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # CONCURRENTLY so a large patients table stays writable while the indexes build
+        with op.get_context().autocommit_block():
+            # Serves both ILIKE 'q%' (prefix) and the % similarity operator (fuzzy)
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_full_name_trgm '
+                'ON patients USING gin (full_name gin_trgm_ops)'
+            )
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_full_name_id '
+                'ON patients (full_name, id)'
+            )
+    else:
+        # SQLite and friends fall back to LIKE; the ordered index still bounds each page
+        op.create_index('ix_patients_full_name_id', 'patients', ['full_name', 'id'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_patients_full_name_trgm')
+    op.drop_index('ix_patients_full_name_id', table_name='patients')
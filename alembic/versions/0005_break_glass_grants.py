@@ -0,0 +1,38 @@
+"""create break_glass_grants table
+
+Revision ID: 0005_break_glass_grants
+Revises: 0004_patient_name_search
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_break_glass_grants'
+down_revision = '0004_patient_name_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'break_glass_grants',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('patient_id', sa.Integer(), sa.ForeignKey('patients.id'), nullable=False),
+        sa.Column('reason', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_break_glass_grants_id', 'break_glass_grants', ['id'])
+    op.create_index(
+        'ix_break_glass_grants_user_patient_expires',
+        'break_glass_grants',
+        ['user_id', 'patient_id', 'expires_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_break_glass_grants_user_patient_expires', table_name='break_glass_grants')
+    op.drop_index('ix_break_glass_grants_id', table_name='break_glass_grants')
+    op.drop_table('break_glass_grants')
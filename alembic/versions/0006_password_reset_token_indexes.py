@@ -0,0 +1,43 @@
+"""add partial indexes for password reset token lookup and purge
+
+Revision ID: 0006_password_reset_token_indexes
+Revises: 0005_break_glass_grants
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0006_password_reset_token_indexes'
+down_revision = '0005_break_glass_grants'
+branch_labels = None
+depends_on = None
+
+# Partial indexes only hold the rows their query can match, so they stay small
+# while the maintenance job keeps purging dead tokens.
+INDEXES = (
+    # get_valid_token_by_hash: live tokens only
+    ('ix_password_reset_tokens_unused', '(token_hash, expires_at)', 'used_at IS NULL'),
+    # purge_expired: expired, never-used tokens ...
+    ('ix_password_reset_tokens_unused_expires', '(expires_at)', 'used_at IS NULL'),
+    # ... and used ones
+    ('ix_password_reset_tokens_used_at', '(used_at)', 'used_at IS NOT NULL'),
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CONCURRENTLY so resets keep working while the indexes build
+        with op.get_context().autocommit_block():
+            for name, columns, where in INDEXES:
+                op.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                    f'ON password_reset_tokens {columns} WHERE {where}'
+                )
+    else:
+        for name, columns, where in INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON password_reset_tokens {columns} WHERE {where}')
+
+
+def downgrade():
+    for name, _, _ in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
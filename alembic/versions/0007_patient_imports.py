@@ -0,0 +1,32 @@
+"""create patient_imports checkpoint table
+
+Revision ID: 0007_patient_imports
+Revises: 0006_password_reset_token_indexes
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_patient_imports'
+down_revision = '0006_password_reset_token_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'patient_imports',
+        sa.Column('job_id', sa.String(), primary_key=True, nullable=False),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('records', sa.Integer(), nullable=False),
+        sa.Column('imported', sa.Integer(), nullable=False),
+        sa.Column('rejected', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('patient_imports')
@@ -0,0 +1,40 @@
+"""add a lower(full_name) btree for prefix name search
+
+Revision ID: 0008_patient_name_prefix_index
+Revises: 0007_patient_imports
+Create Date: 2026-10-18 00:00:00.000000
+
+A prefix search served by the trigram index has to fetch and sort every match
+before ORDER BY ... LIMIT; for one- or two-letter prefixes that is most of the
+table. This btree on (lower(full_name) COLLATE "C", id) matches the prefix as a
+range and returns rows already in the search order, so a page reads only its
+own rows. Byte ("C") order is what lets a plain btree serve LIKE 'x%' (the
+text_pattern_ops class would too, but then it cannot serve the ORDER BY).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_patient_name_prefix_index'
+down_revision = '0007_patient_imports'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_patients_lower_full_name_id '
+                'ON patients (lower(full_name) COLLATE "C", id)'
+            )
+    else:
+        op.create_index('ix_patients_lower_full_name_id', 'patients', [sa.text('lower(full_name)'), 'id'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_patients_lower_full_name_id')
+    else:
+        op.drop_index('ix_patients_lower_full_name_id', table_name='patients')
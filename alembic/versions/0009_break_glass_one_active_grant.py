@@ -0,0 +1,39 @@
+"""allow one active break-glass grant per user and patient
+
+Revision ID: 0009_break_glass_one_active_grant
+Revises: 0008_patient_name_prefix_index
+Create Date: 2026-10-18 00:00:00.000000
+
+Two first requests racing each other both found no grant and both inserted one.
+Grants get an `active` flag, cleared when an expired grant is replaced, and a
+unique index on (user_id, patient_id) over the active rows; the losing insert
+fails and re-reads the winner's grant. Older duplicates are retired first.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009_break_glass_one_active_grant'
+down_revision = '0008_patient_name_prefix_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'break_glass_grants',
+        sa.Column('active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+    )
+    op.execute(
+        "UPDATE break_glass_grants SET active = false WHERE id NOT IN ("
+        "SELECT max(id) FROM break_glass_grants GROUP BY user_id, patient_id)"
+    )
+    op.create_index(
+        'uq_break_glass_grants_active', 'break_glass_grants', ['user_id', 'patient_id'], unique=True,
+        postgresql_where=sa.text('active'), sqlite_where=sa.text('active'),
+    )
+
+
+def downgrade():
+    op.drop_index('uq_break_glass_grants_active', table_name='break_glass_grants')
+    op.drop_column('break_glass_grants', 'active')
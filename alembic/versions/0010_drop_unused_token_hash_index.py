@@ -0,0 +1,40 @@
+"""drop the redundant partial token_hash index on password_reset_tokens
+
+Revision ID: 0010_drop_unused_token_hash_index
+Revises: 0009_break_glass_one_active_grant
+Create Date: 2026-10-18 00:00:00.000000
+
+get_valid_token_by_hash is an equality lookup on token_hash, which the unique
+ix_password_reset_tokens_token_hash index already answers in one probe; the
+partial copy from 0006 only cost a second index write per token. The purge keeps
+its two partial indexes (unused by expiry, used by used_at).
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0010_drop_unused_token_hash_index'
+down_revision = '0009_break_glass_one_active_grant'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_password_reset_tokens_unused')
+    else:
+        op.execute('DROP INDEX IF EXISTS ix_password_reset_tokens_unused')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_password_reset_tokens_unused '
+                'ON password_reset_tokens (token_hash, expires_at) WHERE used_at IS NULL'
+            )
+    else:
+        op.execute(
+            'CREATE INDEX IF NOT EXISTS ix_password_reset_tokens_unused '
+            'ON password_reset_tokens (token_hash, expires_at) WHERE used_at IS NULL'
+        )
@@ -0,0 +1,4 @@
+import time
+
+# Reference point for the startup report (app/core/startup.py)
+IMPORT_STARTED = time.perf_counter()
@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from pydantic import BaseModel, constr
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from pydantic import BaseModel, ConfigDict, ValidationError, constr
+from datetime import datetime
+import csv
+import io
+import json
+import tempfile
+import zlib
+from app.database import SessionLocal, get_async_db, get_pool_status
 from app.models.user import User, Role
-from app.crud.user import create_user
-from app.api.auth import get_current_user
+from app.crud.user import (
+    create_user, create_users_bulk, decode_user_cursor, encode_user_cursor, invalidate_principal,
+    principal_cache, user_list_select,
+)
+from app.api.auth import get_current_user, login_throttle, token_cache
+from app.core import config
+from app.core.security import hash_password_async, hash_passwords_async
 
 router = APIRouter(prefix="/admin", tags=["System Administration"])
 
@@ -18,10 +33,31 @@ class UserCreate(BaseModel):
 class AdminReset(BaseModel):
     username: constr(strip_whitespace=True, min_length=1)
     temporary_password: constr(min_length=8)
+
+class UserSummary(BaseModel):
+    id: int
+    username: str
+    role_name: str | None
+    must_change_password: bool
+
+class RoleSummary(BaseModel):
+    id: int
+    role_name: str | None
+
+class AuditEntry(BaseModel):
+    # Validated straight from result rows (attribute access), no per-row dict
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int | None
+    action: str | None
+    resource_id: str | None
+    ip_address: str | None
+    timestamp: datetime | None
 # --- Admin permission check ---
 
 
-def admin_only(current_user: dict = Depends(get_current_user)):
+async def admin_only(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "Admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -31,36 +67,146 @@ def admin_only(current_user: dict = Depends(get_current_user)):
 
 # --- Endpoints ---
 @router.post("/register-user")
-def register_staff(
+async def register_staff(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(admin_only)
 ):
-    # 1. Check username (strip and case-insensitive)
     desired_username = user_data.username.strip()
+    role = await db.run_sync(_check_new_user, desired_username, user_data.role_name)
+
+    # 3. Create user (store trimmed username); bcrypt runs on the KDF pool
+    hashed = await hash_password_async(user_data.password)
+    user = await db.run_sync(create_user, desired_username, user_data.password, role.id, hashed)
+    return {"message": f"User '{user.username}' created with role '{role.role_name}'"}
+
+
+def _check_new_user(db: Session, desired_username: str, role_name: str):
+    # 1. Check username (strip and case-insensitive)
     existing_user = db.query(User).filter(func.lower(User.username) == desired_username.lower()).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
 
     # 2. Get role
-    role = db.query(Role).filter(Role.role_name == user_data.role_name).first()
+    role = db.query(Role).filter(Role.role_name == role_name).first()
     if not role:
         raise HTTPException(status_code=400, detail="Role does not exist")
+    return role
+
+
+@router.post("/register-users")
+async def register_staff_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(admin_only)
+):
+    """
+    Register a cohort in one call. Body: a JSON list of {username, password, role_name}
+    (or {"users": [...]}), or CSV with those columns sent as Content-Type text/csv.
+    Each row is checked like /register-user; the accepted ones are hashed in parallel
+    on the KDF pool and inserted in one transaction. Returns one result per input row.
+    """
+    rows = await _read_user_batch(request)
+    if not rows:
+        raise HTTPException(status_code=422, detail="No users given")
+    if len(rows) > config.REGISTER_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {config.REGISTER_BATCH_MAX} users per batch")
+
+    results = [None] * len(rows)
+    candidates = []  # (row index, UserCreate)
+    for i, raw in enumerate(rows):
+        try:
+            candidates.append((i, UserCreate.model_validate(raw)))
+        except ValidationError as exc:
+            username = raw.get("username") if isinstance(raw, dict) else None
+            results[i] = _bulk_error(i, username, exc.errors()[0]["msg"])
+
+    # One lookup for every username and every role in the batch
+    taken, role_ids = await db.run_sync(
+        _bulk_lookups, {u.username.lower() for _, u in candidates}, {u.role_name for _, u in candidates}
+    )
+    accepted = []
+    seen = set()
+    for i, user in candidates:
+        key = user.username.lower()
+        if key in taken:
+            results[i] = _bulk_error(i, user.username, "Username already exists")
+        elif key in seen:
+            results[i] = _bulk_error(i, user.username, "Duplicate username in batch")
+        elif user.role_name not in role_ids:
+            results[i] = _bulk_error(i, user.username, "Role does not exist")
+        else:
+            seen.add(key)
+            accepted.append((i, user))
+
+    hashes = await hash_passwords_async([user.password for _, user in accepted])
+    new_users = [
+        {"username": user.username, "hashed_password": hashed, "role_id": role_ids[user.role_name]}
+        for (_, user), hashed in zip(accepted, hashes)
+    ]
+    try:
+        ids = await db.run_sync(create_users_bulk, new_users)
+    except IntegrityError:
+        await db.rollback()
+        # A concurrent registration took one of the names; the transaction created nobody
+        raise HTTPException(status_code=409, detail="Username already exists; no users were created")
+    for i, user in accepted:
+        results[i] = {"row": i, "username": user.username, "status": "created",
+                      "id": ids[user.username], "role_name": user.role_name}
+    return {"created": len(accepted), "failed": len(rows) - len(accepted), "results": results}
+
+
+async def _read_user_batch(request: Request) -> list:
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+    if "csv" in content_type:
+        try:
+            return list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+        except (UnicodeDecodeError, csv.Error):
+            raise HTTPException(status_code=400, detail="Malformed CSV")
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed JSON")
+    if isinstance(data, dict):
+        data = data.get("users")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=422, detail="Expected a list of users")
+    return data
+
+
+def _bulk_lookups(db: Session, usernames: set, role_names: set):
+    taken = set(db.execute(
+        select(func.lower(User.username)).where(func.lower(User.username).in_(usernames))
+    ).scalars())
+    role_ids = dict(db.execute(select(Role.role_name, Role.id).where(Role.role_name.in_(role_names))).all())
+    return taken, role_ids
+
+
+def _bulk_error(row: int, username, detail: str) -> dict:
+    return {"row": row, "username": username, "status": "error", "detail": detail}
 
-    # 3. Create user (store trimmed username)
-    user = create_user(db, desired_username, user_data.password, role.id)
-    return {"message": f"User '{user.username}' created with role '{role.role_name}'"}
 
 @router.post('/reset-password')
-def admin_reset_password(data: AdminReset, db: Session = Depends(get_db), current_user: dict = Depends(admin_only)):
+async def admin_reset_password(data: AdminReset, db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(admin_only)):
     desired_username = data.username.strip()
-    user = db.query(User).filter(func.lower(User.username) == desired_username.lower()).first()
+    user = await db.run_sync(_find_user_ci, desired_username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    from app.core.security import hash_password
-    user.hashed_password = hash_password(data.temporary_password)
+    hashed = await hash_password_async(data.temporary_password)
+    await db.run_sync(_apply_admin_reset, user, hashed)
+    return {"message": f"Temporary password set for '{user.username}'. User must change password on next login."}
+
+
+def _find_user_ci(db: Session, username: str):
+    return db.query(User).filter(func.lower(User.username) == username.lower()).first()
+
+
+def _apply_admin_reset(db: Session, user: User, hashed: str):
+    user.hashed_password = hashed
     db.add(user)
     db.commit()
+    invalidate_principal(username=user.username, user_id=user.id)
     # Set must_change_password flag in user_flags table
     from app.crud.user_flags import set_must_change
     set_must_change(db, user.id, True)
@@ -68,29 +214,247 @@ def admin_reset_password(data: AdminReset, db: Session = Depends(get_db), curren
     from app.crud.audit import log_event
     # Log admin reset (user_id is None for operator-triggered event)
     log_event(db, None, f"PASSWORD_ADMIN_RESET: {user.username}")
-    return {"message": f"Temporary password set for '{user.username}'. User must change password on next login."}
 
-@router.get("/roles")
-def list_roles(db: Session = Depends(get_db), current_user: dict = Depends(admin_only)):
-    from app.models.user import Role
-    roles = db.query(Role).all()
-    return [{"id": r.id, "role_name": r.role_name} for r in roles]
-@router.get("/audit-logs")
-def list_audit_logs(db: Session = Depends(get_db), current_user: dict = Depends(admin_only)):
-    from app.models.audit import AuditLog
-    logs = db.query(AuditLog).order_by(AuditLog.timestamp.desc()).limit(200).all()
+@router.get("/roles", response_model=list[RoleSummary])
+async def list_roles(db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(admin_only)):
+    result = await db.execute(select(Role.id, Role.role_name))
+    return [RoleSummary(id=r.id, role_name=r.role_name) for r in result]
+@router.get("/audit-logs", response_model=list[AuditEntry])
+async def list_audit_logs(
+    response: Response,
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: str | None = None,
+    user_id: int | None = None,
+    action: str | None = None,
+    resource_id: str | None = None,
+    ip_address: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(admin_only),
+):
+    """
+    Newest-first audit entries, keyset-paginated on (timestamp, id).
+    When more rows exist, the `X-Next-Cursor` header carries the cursor for the next page.
+    """
+    from app.crud.audit import audit_log_select, decode_audit_cursor, encode_audit_cursor
+    before = None
+    if cursor:
+        try:
+            before = decode_audit_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    stmt = audit_log_select(
+        user_id=user_id, action=action, resource_id=resource_id, ip_address=ip_address,
+        since=since, until=until, before=before,
+    )
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_audit_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows
+
+@router.get("/audit-logs/export")
+async def export_audit_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    compress: str | None = Query(None, pattern="^gzip$"),
+    user_id: int | None = None,
+    action: str | None = None,
+    resource_id: str | None = None,
+    ip_address: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(admin_only),
+):
+    """
+    Stream every matching audit entry, oldest first, as NDJSON or CSV (optionally gzipped).
+    Rows are read through a server-side cursor and written out batch by batch.
+    """
+    from app.crud.audit import audit_log_select, log_event, stream_audit_rows
+    stmt = audit_log_select(
+        user_id=user_id, action=action, resource_id=resource_id, ip_address=ip_address,
+        since=since, until=until, newest_first=False,
+    )
+    await db.run_sync(log_event, None, f"AUDIT_EXPORT: {current_user['username']}")
+
+    batches = stream_audit_rows(stmt, config.AUDIT_EXPORT_BATCH_SIZE)
+    body = _csv_chunks(batches) if format == "csv" else _ndjson_chunks(batches)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"audit_logs.{format}"
+    if compress:
+        body = _gzip_chunks(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+_EXPORT_FIELDS = ("id", "user_id", "action", "resource_id", "ip_address", "timestamp")
+
+
+async def _ndjson_chunks(batches):
+    async for rows in batches:
+        yield "".join(
+            json.dumps({
+                "id": r.id,
+                "user_id": r.user_id,
+                "action": r.action,
+                "resource_id": r.resource_id,
+                "ip_address": r.ip_address,
+                "timestamp": r.timestamp.isoformat() if r.timestamp else None,
+            }) + "\n"
+            for r in rows
+        ).encode()
+
+
+async def _csv_chunks(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_EXPORT_FIELDS)
+    async for rows in batches:
+        writer.writerows(
+            (r.id, r.user_id, r.action, r.resource_id, r.ip_address, r.timestamp.isoformat() if r.timestamp else None)
+            for r in rows
+        )
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+async def _gzip_chunks(chunks):
+    gz = zlib.compressobj(wbits=31)  # 31 = gzip container
+    async for chunk in chunks:
+        data = gz.compress(chunk)
+        if data:
+            yield data
+    yield gz.flush()
+
+
+@router.get("/users", response_model=list[UserSummary])
+async def list_users(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    role: str | None = None,
+    username_prefix: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(admin_only),
+):
+    """
+    Staff accounts ordered by username, keyset-paginated, optionally filtered by
+    role name and username prefix. When more rows exist, the `X-Next-Cursor`
+    header carries the cursor for the next page.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_user_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    stmt = user_list_select(role_name=role, username_prefix=username_prefix, after=after)
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_user_cursor(rows[-1].username)
     return [
-        {
-            "id": l.id,
-            "user_id": l.user_id,
-            "action": l.action,
-            "resource_id": l.resource_id,
-            "ip_address": l.ip_address,
-            "timestamp": l.timestamp.isoformat() if l.timestamp else None,
-        }
-        for l in logs
+        UserSummary(
+            id=r.id, username=r.username, role_name=r.role_name,
+            must_change_password=bool(r.must_change_password),
+        )
+        for r in rows
     ]
 
-@router.get("/users")
-def list_users(db: Session = Depends(get_db), current_user: dict = Depends(admin_only)):
-    return db.query(User).all()
+@router.get("/cache-stats")
+def cache_stats(current_user: dict = Depends(admin_only)):
+    from app.crud.patient import patient_cache
+    return {"principal": principal_cache.stats(), "token": token_cache.stats(), "patient": patient_cache.stats()}
+
+@router.get("/login-throttle")
+def login_throttle_stats(current_user: dict = Depends(admin_only)):
+    return login_throttle.stats()
+
+@router.get("/db-pool")
+def db_pool_status(current_user: dict = Depends(admin_only)):
+    return get_pool_status()
+
+@router.get("/maintenance")
+def maintenance_status(current_user: dict = Depends(admin_only)):
+    """Leadership plus per-job run counts, rows removed and durations."""
+    from app.core.maintenance import maintenance
+    return maintenance.stats()
+
+
+@router.get("/startup")
+def startup_report(current_user: dict = Depends(admin_only)):
+    """This worker's cold start: import time, warm-up steps and time until ready."""
+    from app.core.startup import startup
+    return startup.as_dict()
+
+
+# --- Patient import ---
+MAX_REPORTED_REJECTS = 100
+
+@router.post("/patient-import")
+async def import_patients_upload(
+    request: Request,
+    job_id: str = Query(..., min_length=1, max_length=100),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    restart: bool = False,
+    current_user: dict = Depends(admin_only),
+):
+    """
+    Load a patient file sent as the raw request body: CSV with full_name and
+    medical_history columns, or NDJSON objects with those keys. The body is spooled
+    to a temporary file as it arrives and loaded in checkpointed chunks; after a
+    failure, send the same file with the same job_id to resume. Progress is on
+    GET /admin/patient-import/{job_id} while the load runs.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        client_ip = request.client.host if request.client else None
+        return await run_in_threadpool(_run_patient_import, spool, job_id, format, restart, current_user["username"], client_ip)
+    finally:
+        spool.close()
+
+
+def _run_patient_import(spool, job_id: str, fmt: str, restart: bool, admin_username: str, client_ip: str):
+    from app.crud.audit import log_event
+    from app.crud.patient_import import ImportFormatError, import_patients
+    rejects = []
+
+    def on_reject(record_no, reason, record):
+        if len(rejects) < MAX_REPORTED_REJECTS:
+            rejects.append({"record": record_no, "reason": reason})
+
+    db = SessionLocal()
+    try:
+        text_stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            summary = import_patients(
+                db, text_stream, fmt, job_id, source="upload",
+                chunk_size=config.PATIENT_IMPORT_CHUNK_SIZE, restart=restart, on_reject=on_reject,
+            )
+        except ImportFormatError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        finally:
+            text_stream.detach()
+        log_event(db, None, f"PATIENT_IMPORT: {admin_username}", resource_id=job_id, ip_address=client_ip)
+    finally:
+        db.close()
+    return dict(summary, rejects=rejects)
+
+
+@router.get("/patient-import/{job_id}")
+async def patient_import_status(job_id: str, db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(admin_only)):
+    from app.crud.patient_import import get_import
+    summary = await db.run_sync(get_import, job_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return summary
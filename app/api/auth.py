@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 from pydantic import BaseModel, constr
 import secrets
 import hashlib
+import math
+import time
 from datetime import datetime, timedelta
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_async_db
+from app.core import config
+from app.core.cache import TTLCache
+from app.core.ratelimit import InMemoryRateLimitBackend, LoginThrottle, RedisRateLimitBackend
 from app.models.user import User
-from app.core.security import verify_password, create_access_token, SECRET_KEY, ALGORITHM, hash_password
-from app.crud.audit import log_event
-from app.crud.password_reset import create_reset_token, get_valid_token_by_hash, mark_token_used
-from app.crud.audit import log_event
+from app.models.user_flags import UserFlags
+from app.core.security import verify_password_async, create_access_token, SECRET_KEY, ALGORITHM, hash_password_async, needs_rehash, KDFBusyError
+from app.crud.password_reset import create_reset_token, get_valid_token_by_hash
+from app.crud.audit import log_event, log_login_failure
+from app.crud.user import Principal, get_login_principal, invalidate_principal, rehash_password
+from app.crud.user_flags import get_flags
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -31,47 +39,100 @@ class ResetPasswordRequest(BaseModel):
 # --- OAuth2 for FastAPI ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# --- Login throttle (runs before any bcrypt work) ---
+login_throttle = LoginThrottle(
+    RedisRateLimitBackend(config.REDIS_URL) if config.LOGIN_RATE_BACKEND == "redis" else InMemoryRateLimitBackend(),
+    window=config.LOGIN_RATE_WINDOW_SECONDS,
+    per_username=config.LOGIN_RATE_PER_USERNAME,
+    per_ip=config.LOGIN_RATE_PER_IP,
+)
+
 # --- LOGIN ENDPOINT ---
+# Async so that bcrypt runs on the dedicated KDF pool; DB steps run on the async
+# session, so no threadpool thread is held while waiting on either.
 @router.post("/login")
-def login(login_req: LoginRequest, db: Session = Depends(get_db), request: Request = None):
+async def login(
+    login_req: LoginRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    request: Request = None,
+):
     # capture client IP if available
     client_ip = None
     if request and getattr(request, 'client', None):
         client_ip = request.client.host
 
-    # 1. Find user in database
-    user = db.query(User).filter(User.username == login_req.username).first()
+    # 0. Refuse over-limit attempts before spending any CPU on hashing
+    if config.LOGIN_RATE_LIMIT_ENABLED:
+        retry_after = await login_throttle.check(login_req.username, client_ip)
+        if retry_after:
+            await db.run_sync(log_login_failure, "LOGIN_THROTTLED", login_req.username, client_ip)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    # 1. Find user, role and must-change flag (one joined query, cached)
+    user, hashed_password = await db.run_sync(get_login_principal, login_req.username)
 
     # 2. Verify password
-    if not user or not verify_password(login_req.password, user.hashed_password):
-        # Log failed login attempt (username may not exist)
-        log_event(db, None, f"LOGIN_FAILED: {login_req.username}", ip_address=client_ip)
+    try:
+        verified = bool(user) and await verify_password_async(login_req.password, hashed_password)
+    except KDFBusyError:
+        # 503 is the server's fault: the attempt must not count against the user
+        if config.LOGIN_RATE_LIMIT_ENABLED:
+            await login_throttle.release(login_req.username, client_ip)
+        raise
+    if not verified:
+        # Log failed login attempt (username may not exist); repeats are aggregated
+        await db.run_sync(log_login_failure, "LOGIN_FAILED", login_req.username, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
 
-    # 3. Log success and create JWT with role
+    # Only failed attempts count towards the throttle
+    if config.LOGIN_RATE_LIMIT_ENABLED:
+        await login_throttle.release(login_req.username, client_ip)
+
+    # 3. Bring the stored hash to the configured bcrypt cost after the response is sent
+    if needs_rehash(hashed_password):
+        background_tasks.add_task(_rehash_after_login, user.id, hashed_password, login_req.password)
+
+    return await db.run_sync(_complete_login, user, client_ip)
+
+
+async def _rehash_after_login(user_id: int, old_hash: str, password: str):
+    try:
+        new_hash = await hash_password_async(password)
+    except KDFBusyError:
+        return  # pool saturated; the next login will try again
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(rehash_password, user_id, old_hash, new_hash)
+
+
+def _complete_login(db: Session, user: Principal, client_ip: str | None):
+    # 4. Log success and create JWT with role
     log_event(db, user.id, "LOGIN_SUCCESS", ip_address=client_ip)
 
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role.role_name}
+        data={"sub": user.username, "role": user.role_name}
     )
 
-    # Read must_change_password from flags table (keeps app independent of external 'users' table schema)
-    try:
-        from app.crud.user_flags import get_flags
-        flags = get_flags(db, user.id)
-        must_change = bool(flags.must_change_password) if flags else False
-    except Exception:
-        must_change = False
-
-    return {"access_token": access_token, "token_type": "bearer", "must_change_password": must_change}
+    # must_change_password comes from the flags table (keeps app independent of external 'users' table schema)
+    return {"access_token": access_token, "token_type": "bearer", "must_change_password": user.must_change_password}
 
 @router.post("/forgot-password")
-def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
+async def forgot_password(req: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(_issue_reset_token, req.username)
+    # Always return a neutral response
+    return {"message": "If an account exists we sent password reset instructions."}
+
+
+def _issue_reset_token(db: Session, username: str):
     # Use username to look up account; in production use email and send link
-    user = db.query(User).filter(User.username == req.username).first()
+    user = db.query(User).filter(User.username == username).first()
     if user:
         raw_token = secrets.token_urlsafe(32)
         token_hash = hashlib.sha256(raw_token.encode()).hexdigest()
@@ -80,32 +141,56 @@ def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
         log_event(db, user.id, "PASSWORD_RESET_REQUESTED")
         # TODO: send email. For now, print the reset link so it can be used in tests/dev
         print(f"Password reset link (one-time): http://example/reset?token={raw_token}")
-    # Always return a neutral response
-    return {"message": "If an account exists we sent password reset instructions."}
 
 @router.post("/reset-password")
-def reset_password(req: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(req: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     token_hash = hashlib.sha256(req.token.encode()).hexdigest()
-    token_obj = get_valid_token_by_hash(db, token_hash)
+    token_obj, user = await db.run_sync(_find_reset_target, token_hash)
     if not token_obj:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-
-    user = db.query(User).filter(User.id == token_obj.user_id).first()
     if not user:
         raise HTTPException(status_code=400, detail="Invalid token")
 
-    # Update password and mark token used
-    user.hashed_password = hash_password(req.new_password)
-    user.must_change_password = False
+    new_hash = await hash_password_async(req.new_password)
+    await db.run_sync(_complete_reset, user, token_obj, new_hash)
+
+    return {"message": "Password reset successful"}
+
+
+def _find_reset_target(db: Session, token_hash: str):
+    token_obj = get_valid_token_by_hash(db, token_hash)
+    if not token_obj:
+        return None, None
+    user = db.query(User).filter(User.id == token_obj.user_id).first()
+    return token_obj, user
+
+
+def _complete_reset(db: Session, user: User, token_obj, new_hash: str):
+    # New password, cleared must-change flag and used token commit together
+    user.hashed_password = new_hash
     db.add(user)
+    flags = get_flags(db, user.id)
+    if flags is None:
+        db.add(UserFlags(user_id=user.id, must_change_password=False))
+    else:
+        flags.must_change_password = False
+    token_obj.used_at = datetime.utcnow()
+    db.add(token_obj)
     db.commit()
-    mark_token_used(db, token_obj.id)
+    invalidate_principal(username=user.username, user_id=user.id)
     log_event(db, user.id, "PASSWORD_RESET_COMPLETED")
 
-    return {"message": "Password reset successful"}
-
 # --- GET CURRENT USER FROM TOKEN ---
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Verified claims keyed by token digest, so repeat requests with the same bearer
+# token skip signature verification and JSON parsing. Each entry expires no later
+# than the token itself.
+token_cache = TTLCache(config.TOKEN_CACHE_MAX, config.TOKEN_CACHE_TTL_SECONDS)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -115,7 +200,11 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials"
             )
-        return {"username": username, "role": role}
+        current_user = {"username": username, "role": role}
+        exp = payload.get("exp")
+        if exp is not None:
+            token_cache.set(key, current_user, ttl=min(token_cache.ttl, exp - time.time()))
+        return dict(current_user)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import DATABASE_BACKEND, get_async_db
+from app.core import config
+from app.crud.audit import log_event, log_events
+from app.crud.break_glass import get_active_grant, issue_grant
+from app.crud.patient import (
+    patient_search_select, encode_patient_cursor, decode_patient_cursor,
+    patient_cache, patient_record, patient_validators, etag_matches, load_patients,
+)
 from app.models.patient import Patient
-from app.models.audit import AuditLog
 import os
 
 router = APIRouter(prefix="/patients", tags=["Patients"])
@@ -11,18 +21,183 @@ router = APIRouter(prefix="/patients", tags=["Patients"])
 def get_current_user(): 
     return {"id": 1, "role": "Doctor"} 
 
-@router.get("/{patient_id}")
-def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
+# Declared response models let FastAPI serialize straight to JSON bytes in
+# pydantic-core instead of walking every value with jsonable_encoder.
+class PatientSummary(BaseModel):
+    id: int
+    full_name: str
+    updated_at: datetime | None
+
+class PatientRecord(BaseModel):
+    id: int
+    full_name: str
+    medical_history: str | None
+    updated_at: datetime | None
+
+class GrantSummary(BaseModel):
+    id: int
+    reason: str
+    expires_at: datetime
+
+class BreakGlassResponse(BaseModel):
+    warning: str
+    data: PatientRecord
+    grant: GrantSummary
+
+@router.get("", response_model=list[PatientSummary])
+async def search_patients(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    match: str = Query("prefix", pattern="^(prefix|fuzzy)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Search patients by name; returns id, full_name and updated_at only.
+    When more results exist, the `X-Next-Cursor` header carries the cursor for the next page.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_patient_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    stmt = patient_search_select(q.strip(), match, DATABASE_BACKEND, after)
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_patient_cursor(rows[-1].full_name, rows[-1].id)
+    return [PatientSummary(id=r.id, full_name=r.full_name, updated_at=r.updated_at) for r in rows]
+
+class PatientBatchRequest(BaseModel):
+    ids: list[int]
+
+
+# Declared before /{patient_id} so "batch" is not parsed as an id
+@router.get("/batch")
+async def get_patients_batch_query(
+    request: Request,
+    ids: list[str] = Query(..., description="Comma-separated and/or repeated patient ids"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        patient_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be integers")
+    return await _patients_batch(patient_ids, request, db, current_user)
+
+
+@router.post("/batch")
+async def get_patients_batch(
+    body: PatientBatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user),
+):
+    return await _patients_batch(body.ids, request, db, current_user)
+
+
+async def _patients_batch(patient_ids: list, request: Request, db: AsyncSession, current_user: dict):
+    """
+    Load up to PATIENT_BATCH_MAX patients with one IN query (cache hits excluded) and
+    stream them back in request order as {"patients": [...], "missing": [...]}.
+    Every returned record is audited in one batched write.
+    """
+    requested = list(dict.fromkeys(patient_ids))  # de-duplicate, keep request order
+    if not requested:
+        raise HTTPException(status_code=422, detail="No patient ids given")
+    if len(requested) > config.PATIENT_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {config.PATIENT_BATCH_MAX} patients per batch")
+
+    found = await load_patients(db, requested)
+    missing = [pid for pid in requested if pid not in found]
+
+    client_ip = request.client.host if request.client else None
+    await db.run_sync(log_events, [
+        {"user_id": current_user["id"], "action": "PATIENT_VIEW", "resource_id": str(pid), "ip_address": client_ip}
+        for pid in requested if pid in found
+    ])
+
+    def body():
+        # Cached records are plain dicts; to_json encodes them (datetimes included)
+        # in pydantic-core, several times faster than json.dumps per record
+        yield b'{"patients":['
+        first = True
+        for pid in requested:
+            record = found.get(pid)
+            if record is None:
+                continue
+            yield (b"" if first else b",") + to_json(record)
+            first = False
+        yield b'],"missing":' + to_json(missing) + b"}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+@router.get("/{patient_id}", response_model=PatientRecord)
+async def get_patient(
+    patient_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Patient record, served from the read-through cache when possible.
+    Carries ETag/Last-Modified; a matching If-None-Match gets an empty 304.
+    """
+    record = patient_cache.get(patient_id)
+    if record is None:
+        patient = await db.get(Patient, patient_id)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Not found")
+        record = patient_record(patient)
+        patient_cache.set(patient_id, record)
+
+    etag, last_modified = patient_validators(record)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return record
+
+@router.post("/{patient_id}/break-glass", response_model=BreakGlassResponse)
+async def break_glass(
+    patient_id: int,
+    reason: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Emergency access. The first call opens a time-boxed grant for this user and
+    patient; calls inside the grant window are authorized by a cache lookup and
+    their access is logged through the batched audit writer.
+    """
+    user_id = current_user["id"]
+    client_ip = request.client.host if request.client else None
+    found = await load_patients(db, [patient_id])
+    if patient_id not in found:
+        # Integrity: the attempt is logged even when there is nothing to open
+        await db.run_sync(log_event, user_id, f"BREAK-GLASS: {reason}", str(patient_id), client_ip)
         raise HTTPException(status_code=404, detail="Not found")
-    return patient
-
-@router.post("/{patient_id}/break-glass")
-def break_glass(patient_id: int, reason: str, db: Session = Depends(get_db)):
-    # Integrity: Log the emergency access
-    log = AuditLog(user_id=1, action=f"BREAK-GLASS: {reason}", resource_id=str(patient_id))
-    db.add(log)
-    db.commit()
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    return {"warning": "Emergency Access Logged", "data": patient}
\ No newline at end of file
+
+    grant = await get_active_grant(db, user_id, patient_id)
+    created = False
+    if grant is None:
+        grant, created = await issue_grant(db, user_id, patient_id, reason)
+    if created:
+        # Integrity: Log the emergency access
+        action = f"BREAK-GLASS: {reason}"
+    else:
+        action = f"BREAK-GLASS-ACCESS (grant {grant['id']}): {reason}"
+    await db.run_sync(log_event, user_id, action, str(patient_id), client_ip)
+
+    return {
+        "warning": "Emergency Access Logged",
+        "data": found[patient_id],
+        "grant": grant,
+    }
@@ -0,0 +1,117 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# --- Audit log writer ---
+# When enabled, audit events are queued in memory and written in batches by a
+# background thread instead of committing on the caller's request session.
+AUDIT_ASYNC = _env_bool("AUDIT_ASYNC", True)
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+# Rows fetched per server-side cursor round trip by /admin/audit-logs/export
+AUDIT_EXPORT_BATCH_SIZE = int(os.getenv("AUDIT_EXPORT_BATCH_SIZE", "2000"))
+
+# --- Password hashing pool ---
+# bcrypt runs on a dedicated executor so logins cannot starve the request threadpool.
+# bcrypt releases the GIL, so the default thread executor already uses every core.
+KDF_EXECUTOR = os.getenv("KDF_EXECUTOR", "thread").strip().lower()  # "thread" or "process"
+KDF_WORKERS = int(os.getenv("KDF_WORKERS", str(os.cpu_count() or 2)))
+# Hash jobs allowed in flight (running + waiting) before new ones are refused with 503
+KDF_MAX_PENDING = int(os.getenv("KDF_MAX_PENDING", str(KDF_WORKERS * 4)))
+KDF_RETRY_AFTER_SECONDS = int(os.getenv("KDF_RETRY_AFTER_SECONDS", "1"))
+# Most users one POST /admin/register-users call may create (hashed in parallel, one transaction)
+REGISTER_BATCH_MAX = int(os.getenv("REGISTER_BATCH_MAX", "5000"))
+
+# --- Authenticated-principal cache ---
+# Caches id, role and must-change flag per username (never the password hash, which
+# login always reads fresh). Invalidation is per process: a role or flag change made
+# through another worker is seen here after at most PRINCIPAL_CACHE_TTL_SECONDS.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX = int(os.getenv("PRINCIPAL_CACHE_MAX", "10000"))
+
+# --- Verified-token cache (get_current_user) ---
+# Entries never outlive the token's own `exp`; this is only an upper bound.
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+
+# --- Database connection pool ---
+# DB_POOL_MODE=queue keeps a local pool; DB_POOL_MODE=null opens a connection per
+# checkout, for transaction-mode poolers (PgBouncer / Supabase pooler on 6543).
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").strip().lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; -1 disables
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+
+# --- Patient record read cache (GET /patients/{id}) ---
+PATIENT_CACHE_TTL_SECONDS = float(os.getenv("PATIENT_CACHE_TTL_SECONDS", "30"))
+PATIENT_CACHE_MAX = int(os.getenv("PATIENT_CACHE_MAX", "5000"))
+# Most patients one GET/POST /patients/batch call may request
+PATIENT_BATCH_MAX = int(os.getenv("PATIENT_BATCH_MAX", "100"))
+# Records per COPY/executemany + checkpoint commit in patient imports
+PATIENT_IMPORT_CHUNK_SIZE = int(os.getenv("PATIENT_IMPORT_CHUNK_SIZE", "5000"))
+
+# --- Break-glass grants ---
+# One break-glass request opens a grant for this long; repeat emergency reads of the
+# same patient by the same user inside the window are authorized from memory.
+BREAK_GLASS_GRANT_MINUTES = int(os.getenv("BREAK_GLASS_GRANT_MINUTES", "15"))
+BREAK_GLASS_CACHE_MAX = int(os.getenv("BREAK_GLASS_CACHE_MAX", "10000"))
+
+# --- Login throttling (checked before any password hashing) ---
+LOGIN_RATE_LIMIT_ENABLED = _env_bool("LOGIN_RATE_LIMIT_ENABLED", True)
+LOGIN_RATE_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_WINDOW_SECONDS", "300"))
+LOGIN_RATE_PER_USERNAME = int(os.getenv("LOGIN_RATE_PER_USERNAME", "10"))
+LOGIN_RATE_PER_IP = int(os.getenv("LOGIN_RATE_PER_IP", "100"))
+# "memory" (per process) or "redis" (shared across workers; needs REDIS_URL and the redis package).
+# Only failed attempts count: a successful login gives its attempt back. If Redis is
+# unreachable the redis backend fails open to per-process limits until it recovers.
+LOGIN_RATE_BACKEND = os.getenv("LOGIN_RATE_BACKEND", "memory").strip().lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Repeated failed/throttled logins for the same username+IP become one audit row per interval
+LOGIN_FAIL_AUDIT_INTERVAL_SECONDS = float(os.getenv("LOGIN_FAIL_AUDIT_INTERVAL_SECONDS", "60"))
+
+# --- Password hashing cost ---
+# bcrypt work factor for new hashes (each +1 doubles the cost). Pick it per host with
+# `python scripts/calibrate_bcrypt.py --target-ms 100`. Hashes at any other cost are
+# re-hashed in the background after the user's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# --- Background maintenance (single leader across workers) ---
+MAINTENANCE_ENABLED = _env_bool("MAINTENANCE_ENABLED", True)
+MAINTENANCE_TICK_SECONDS = float(os.getenv("MAINTENANCE_TICK_SECONDS", "30"))
+# Postgres advisory lock id that elects the maintenance leader. Needs a direct (or
+# session-pooled) connection: with DB_POOL_MODE=null no worker runs the jobs.
+MAINTENANCE_LOCK_KEY = int(os.getenv("MAINTENANCE_LOCK_KEY", "727100016"))
+RESET_TOKEN_PURGE_INTERVAL_SECONDS = float(os.getenv("RESET_TOKEN_PURGE_INTERVAL_SECONDS", "900"))
+RESET_TOKEN_PURGE_BATCH_SIZE = int(os.getenv("RESET_TOKEN_PURGE_BATCH_SIZE", "1000"))
+AUDIT_PARTITION_CHECK_INTERVAL_SECONDS = float(os.getenv("AUDIT_PARTITION_CHECK_INTERVAL_SECONDS", "21600"))
+
+# --- Observability ---
+# Per-route request metrics in Prometheus format on GET /metrics
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+
+# --- SQL diagnostics (development and tests) ---
+# "off", "log" (warn about N+1 / slow statements / budget overruns) or "strict" (overruns raise)
+QUERY_DIAGNOSTICS = os.getenv("QUERY_DIAGNOSTICS", "off").strip().lower()
+QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", "100"))
+# Identical statement shapes per request before they are reported as a likely N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+# Per-route statement budgets, e.g. "POST /auth/login=3; GET /admin/users=2"
+QUERY_BUDGETS = os.getenv("QUERY_BUDGETS", "")
+
+# --- Startup (FastAPI lifespan) ---
+# Connections opened per engine before the worker reports ready (0 skips warm-up;
+# capped at DB_POOL_SIZE). A failed warm-up is logged and does not block startup.
+STARTUP_WARM_CONNECTIONS = int(os.getenv("STARTUP_WARM_CONNECTIONS", "2"))
+# Start the password hashing workers before the first login instead of during it
+STARTUP_WARM_KDF = _env_bool("STARTUP_WARM_KDF", True)
+# Cold-start budget in seconds (import + warm-up); exceeding it logs a warning. 0 disables.
+STARTUP_TARGET_SECONDS = float(os.getenv("STARTUP_TARGET_SECONDS", "0"))
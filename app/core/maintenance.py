@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core import config
+from app.database import SessionLocal, get_engine
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceJob:
+    def __init__(self, name: str, fn, interval_seconds: float):
+        self.name = name
+        self.fn = fn  # fn(db) -> rows affected
+        self.interval = interval_seconds
+        self.next_run = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.rows_total = 0
+        self.last_rows = None
+        self.last_duration_ms = None
+        self.total_duration_ms = 0.0
+        self.last_run_at = None
+        self.last_error = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "rows_total": self.rows_total,
+            "last_rows": self.last_rows,
+            "last_duration_ms": self.last_duration_ms,
+            "avg_duration_ms": round(self.total_duration_ms / self.runs, 3) if self.runs else None,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_error": self.last_error,
+        }
+
+
+class MaintenanceScheduler:
+    """
+    Runs periodic housekeeping jobs on a background thread.
+
+    With several workers (or hosts) only one runs the jobs: on Postgres the leader
+    holds a session-level advisory lock on a dedicated connection, and the others
+    keep trying to take it over on every tick. On other backends (local SQLite)
+    the process is always the leader.
+
+    The lock connection runs in autocommit so it never sits idle in a transaction.
+    A session lock cannot be trusted behind a transaction pooler (PgBouncer in
+    transaction mode), where the server connection changes hands between
+    statements, so with DB_POOL_MODE=null no worker becomes leader: run the jobs
+    from a worker connected directly to Postgres with DB_POOL_MODE=queue.
+    """
+
+    def __init__(self, engine_factory, session_factory, tick_seconds: float, lock_key: int):
+        self._engine_factory = engine_factory
+        self._session_factory = session_factory
+        self._tick = tick_seconds
+        self._lock_key = lock_key
+        self._jobs = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_conn = None
+        self._pooler_warned = False
+
+    def add_job(self, name: str, fn, interval_seconds: float):
+        self._jobs.append(MaintenanceJob(name, fn, interval_seconds))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._engine_factory().dialect.name != "postgresql" or self._lock_conn is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._release_leadership()
+
+    def _acquire_leadership(self) -> bool:
+        if self._engine_factory().dialect.name != "postgresql":
+            return True
+        if config.DB_POOL_MODE == "null":
+            if not self._pooler_warned:
+                self._pooler_warned = True
+                logger.warning("DB_POOL_MODE=null: no maintenance leader is elected behind a transaction pooler; "
+                               "maintenance jobs do not run in this worker")
+            return False
+        try:
+            if self._lock_conn is not None:
+                self._lock_conn.execute(text("SELECT 1"))  # still holding the lock?
+                return True
+            conn = self._engine_factory().connect().execution_options(isolation_level="AUTOCOMMIT")
+            if conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": self._lock_key}).scalar():
+                self._lock_conn = conn
+                logger.info("Maintenance leadership acquired")
+                return True
+            conn.close()
+        except Exception:
+            logger.exception("Maintenance leader election failed")
+            self._release_leadership()
+        return False
+
+    def _release_leadership(self):
+        conn, self._lock_conn = self._lock_conn, None
+        if conn is None:
+            return
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self._lock_key})
+        except Exception:
+            pass
+        finally:
+            # invalidate: never hand a connection that may still hold the lock back to the pool
+            conn.invalidate()
+            conn.close()
+
+    def run_job(self, job: MaintenanceJob):
+        db = self._session_factory()
+        start = time.perf_counter()
+        try:
+            rows = job.fn(db) or 0
+            job.last_rows = rows
+            job.rows_total += rows
+            job.last_error = None
+        except Exception as exc:
+            db.rollback()
+            job.failures += 1
+            job.last_error = repr(exc)
+            logger.exception("Maintenance job %s failed", job.name)
+        finally:
+            db.close()
+            elapsed = (time.perf_counter() - start) * 1000
+            job.runs += 1
+            job.last_duration_ms = round(elapsed, 3)
+            job.total_duration_ms += elapsed
+            job.last_run_at = datetime.utcnow()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._acquire_leadership():
+                now = time.monotonic()
+                for job in self._jobs:
+                    if self._stop.is_set():
+                        break
+                    if now >= job.next_run:
+                        self.run_job(job)
+                        job.next_run = time.monotonic() + job.interval
+            self._stop.wait(self._tick)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "leader": self.running and self.is_leader,
+            "jobs": {job.name: job.stats() for job in self._jobs},
+        }
+
+
+maintenance = MaintenanceScheduler(
+    get_engine,
+    SessionLocal,
+    tick_seconds=config.MAINTENANCE_TICK_SECONDS,
+    lock_key=config.MAINTENANCE_LOCK_KEY,
+)
@@ -0,0 +1,186 @@
+"""
+In-process request metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are plain Python numbers and preallocated bucket lists
+without locks: request metrics are only updated from the event loop thread (by
+app/middleware/metrics.py), so updates never race. Work done on other threads
+(sync sessions in the threadpool, the KDF pool) is first accumulated on the
+request's own RequestStats and folded in when the request finishes. Statements
+run outside any request (audit writer, maintenance) go to two counters behind a lock.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# Upper bounds (seconds) of the latency histograms; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the queries-per-request histogram
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """What one request spent outside Python: DB statements and password hashing."""
+
+    __slots__ = ("queries", "db_seconds", "kdf_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.kdf_seconds = 0.0
+
+
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.values = {}  # label values tuple -> float
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self, kind: str = "counter"):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {kind}"
+        for label_values, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, label_values)} {_num(value)}"
+
+
+class Gauge(Counter):
+    def set(self, label_values: tuple, value: float):
+        self.values[label_values] = value
+
+    def render(self, kind: str = "gauge"):
+        return super().render(kind)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self.series = {}  # label values tuple -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, label_values: tuple, value: float):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _num(bound)
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {_num(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}"
+
+
+def _num(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS
+)
+db_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_time = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.", ("method", "route"), LATENCY_BUCKETS
+)
+kdf_time = Histogram(
+    "http_request_kdf_seconds", "Time spent waiting for password hashing per request.", ("method", "route"),
+    LATENCY_BUCKETS,
+)
+background_queries = Counter(
+    "db_background_queries_total", "SQL statements executed outside any request (audit writer, maintenance)."
+)
+background_db_time = Counter(
+    "db_background_seconds_total", "Time spent on SQL outside any request."
+)
+http_in_flight.set((), 0)
+_background_lock = threading.Lock()
+
+REQUEST_METRICS = (http_requests, http_in_flight, http_latency, db_queries, db_time, kdf_time)
+
+
+def observe_request(method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+    """Fold one finished request into the registry (event loop thread only)."""
+    labels = (method, route)
+    http_requests.inc((method, route, str(status)))
+    http_latency.observe(labels, elapsed)
+    db_queries.observe(labels, stats.queries)
+    db_time.observe(labels, stats.db_seconds)
+    if stats.kdf_seconds:
+        kdf_time.observe(labels, stats.kdf_seconds)
+
+
+def record_kdf(seconds: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.kdf_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is None:
+        # Audit writer and maintenance threads can run statements at the same time
+        with _background_lock:
+            background_queries.inc()
+            background_db_time.inc(amount=elapsed)
+    else:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def attach_query_tracking(engine):
+    """Attribute statement count and DB time to the current request (see RequestStats)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def render(extra=()) -> str:
+    """
+    Prometheus text for the request metrics plus any extra metric objects.
+    Call it from the event loop (an async route), where request metrics change.
+    """
+    lines = []
+    for metric in REQUEST_METRICS + tuple(extra):
+        lines.extend(metric.render())
+    with _background_lock:
+        for metric in (background_queries, background_db_time):
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
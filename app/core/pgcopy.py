@@ -0,0 +1,29 @@
+"""Postgres COPY helpers that work with either psycopg2 or psycopg (3) DBAPI connections."""
+
+
+def copy_to(dbapi_conn, sql: str, fileobj):
+    """Run a `COPY ... TO STDOUT` statement and write the bytes to `fileobj`."""
+    cur = dbapi_conn.cursor()
+    try:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(sql, fileobj)
+        else:  # psycopg 3
+            with cur.copy(sql) as copy:
+                for data in copy:
+                    fileobj.write(data)
+    finally:
+        cur.close()
+
+
+def copy_from(dbapi_conn, sql: str, fileobj, chunk_size: int = 65536):
+    """Run a `COPY ... FROM STDIN` statement fed from `fileobj` (text or bytes)."""
+    cur = dbapi_conn.cursor()
+    try:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(sql, fileobj, size=chunk_size)
+        else:  # psycopg 3
+            with cur.copy(sql) as copy:
+                while data := fileobj.read(chunk_size):
+                    copy.write(data)
+    finally:
+        cur.close()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram; the last bucket is +Inf.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+
+class PoolStats:
+    """Connection-pool counters for one engine (sync or async)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checked_out = 0
+            self.checkouts = 0
+            self.connects = 0
+            self.connect_failures = 0
+            self.timeouts = 0
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+            self.wait_buckets = [0] * len(WAIT_BUCKETS_MS)
+
+    def record_wait(self, elapsed_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += elapsed_ms
+            if elapsed_ms > self.wait_ms_max:
+                self.wait_ms_max = elapsed_ms
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+
+    def incr(self, name: str, delta: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "connect_failures": self.connect_failures,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "wait_ms_histogram": {
+                    ("+Inf" if bound == float("inf") else str(bound)): count
+                    for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)
+                },
+            }
+
+
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class _InstrumentedPoolMixin:
+    """Times checkouts and counts connect failures/timeouts into the class's `stats`.
+
+    Stats live on the class because SQLAlchemy re-instantiates pools (e.g. after
+    a disconnect) without carrying over extra constructor arguments.
+    """
+
+    stats = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.incr("timeouts")
+            raise
+        self.stats.record_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+    def _create_connection(self):
+        try:
+            record = super()._create_connection()
+        except Exception:
+            self.stats.incr("connect_failures")
+            raise
+        self.stats.incr("connects")
+        return record
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = sync_pool_stats
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    stats = sync_pool_stats
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+class InstrumentedAsyncNullPool(_InstrumentedPoolMixin, NullPool):
+    stats = async_pool_stats
+
+
+def attach_checkout_tracking(engine, stats: PoolStats):
+    """Track currently checked-out connections via pool events (works for any pool class)."""
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        stats.incr("checked_out")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        stats.incr("checked_out", -1)
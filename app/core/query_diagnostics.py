@@ -0,0 +1,175 @@
+"""
+Opt-in SQL diagnostics (QUERY_DIAGNOSTICS=log|strict): fingerprints every
+statement a request (or a `capture_queries()` block) runs, then logs
+
+  * repeated identical statement shapes (likely N+1: a query per row/loop),
+  * statements slower than QUERY_SLOW_MS,
+  * requests over their query budget (QUERY_BUDGETS or `set_query_budget`),
+
+each with the route and an excerpt of the application stack that issued it.
+In strict mode a budget overrun raises QueryBudgetExceeded, which fails the
+test that made the request. The engine hooks stay attached but only record
+inside a capture, so with diagnostics off they cost one ContextVar lookup.
+"""
+import logging
+import os
+import re
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import greenlet
+from sqlalchemy import event
+
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+_MIDDLEWARE_DIR = os.path.join(_APP_DIR, "middleware")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+|%s))*\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r"\s+")
+
+# "METHOD /route/template" -> max statements per request
+budgets = {}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or capture_queries() block ran more statements than its budget."""
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals, placeholder lists and multi-row VALUES collapsed."""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    shape = _VALUES_ROWS.sub(r"\1", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def _app_frames(frames):
+    return [(f.filename, f.lineno, f.name) for f in frames
+            if f.filename.startswith(_APP_DIR) and not f.filename.startswith(_MIDDLEWARE_DIR)
+            and os.path.abspath(f.filename) != _THIS_FILE]
+
+
+def stack_excerpt(limit: int = 4) -> list:
+    """The innermost application frames (app/...), skipping middleware and this module."""
+    frames = _app_frames(traceback.extract_stack())
+    parent = greenlet.getcurrent().parent
+    if not frames and parent is not None and parent.gr_frame is not None:
+        # AsyncSession statements run in a greenlet whose stack starts inside
+        # SQLAlchemy; the awaiting application code is on the parent's stack.
+        frames = _app_frames(traceback.extract_stack(parent.gr_frame))
+    if not frames:
+        return ["(no application frames)"]
+    root = os.path.dirname(_APP_DIR)
+    return [f"{os.path.relpath(filename, root)}:{lineno} in {name}" for filename, lineno, name in frames[-limit:]]
+
+
+class QueryLog:
+    """Statements seen in one request or capture block, grouped by fingerprint."""
+
+    def __init__(self, label: str, budget: int = None):
+        self.label = label
+        self.budget = budget
+        self.count = 0
+        self.shapes = {}  # fingerprint -> [count, total_ms, first stack excerpt]
+        self.slow = []  # (ms, fingerprint, stack excerpt)
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        shape = fingerprint(statement)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, elapsed_ms, stack_excerpt()]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed_ms
+        if elapsed_ms >= config.QUERY_SLOW_MS:
+            self.slow.append((elapsed_ms, shape, stack_excerpt()))
+
+    def repeated(self, threshold: int = None) -> list:
+        """[(fingerprint, count, total_ms, stack)] for shapes run at least `threshold` times."""
+        threshold = config.QUERY_REPEAT_THRESHOLD if threshold is None else threshold
+        return [(shape, n, ms, stack) for shape, (n, ms, stack) in self.shapes.items() if n >= threshold]
+
+    def report(self, strict: bool):
+        """Log what was found; raise QueryBudgetExceeded when over budget and `strict`."""
+        for shape, n, ms, stack in self.repeated():
+            logger.warning("Repeated statement (possible N+1) x%d, %.1f ms total in %s: %s\n  at %s",
+                           n, ms, self.label, shape, "\n  at ".join(stack))
+        for ms, shape, stack in self.slow:
+            logger.warning("Slow statement %.1f ms in %s: %s\n  at %s", ms, self.label, shape, "\n  at ".join(stack))
+        if self.budget is not None and self.count > self.budget:
+            message = f"{self.label} ran {self.count} statements (budget {self.budget})"
+            logger.warning(message)
+            if strict:
+                raise QueryBudgetExceeded(message)
+
+
+_current_log: ContextVar = ContextVar("query_log", default=None)
+
+
+@contextmanager
+def capture_queries(label: str = "capture", budget: int = None, strict: bool = True):
+    """
+    Record the statements run inside the block (same thread/task), e.g. in tests:
+
+        with capture_queries("get_login_principal", budget=1) as log:
+            get_login_principal(db, "dr_smith")
+        assert not log.repeated()
+
+    `label` and `budget` may be updated on the log inside the block. Works whether
+    or not QUERY_DIAGNOSTICS is on; with strict=False an overrun is only logged.
+    """
+    log = QueryLog(label, budget)
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+    log.report(strict)
+
+
+def set_query_budget(method: str, route: str, max_queries: int):
+    budgets[f"{method.upper()} {route}"] = max_queries
+
+
+def _parse_budgets(spec: str):
+    # "GET /admin/users=2; POST /auth/login=3"
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        key, _, value = item.rpartition("=")
+        method, _, route = key.strip().partition(" ")
+        set_query_budget(method, route.strip(), int(value))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_log.get() is not None:
+        conn.info.setdefault("diag_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _current_log.get()
+    if log is not None and conn.info.get("diag_start"):
+        log.record(statement, (time.perf_counter() - conn.info["diag_start"].pop()) * 1000)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("diag_start"):
+        conn.info["diag_start"].pop()
+
+
+def attach_query_diagnostics(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+_parse_budgets(config.QUERY_BUDGETS)
@@ -0,0 +1,205 @@
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryRateLimitBackend:
+    """
+    Sliding-window counter (current + previous fixed window, weighted by overlap)
+    per key, held in this process. Constant memory per key; keys idle for two
+    windows are swept once `max_keys` is exceeded.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._windows = {}  # key -> [window_index, current_count, previous_count]
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """Count one attempt for `key`; return 0 if allowed, else seconds until retry."""
+        now = time.time()
+        idx = int(now // window)
+        into_window = (now % window) / window
+        with self._lock:
+            w = self._windows.get(key)
+            if w is None or w[0] < idx - 1:
+                w = [idx, 0, 0]
+            elif w[0] == idx - 1:
+                w = [idx, 0, w[1]]
+            self._windows[key] = w
+            if w[2] * (1 - into_window) + w[1] >= limit:
+                return window * (1 - into_window)
+            w[1] += 1
+            if len(self._windows) > self._max_keys:
+                self._sweep(idx)
+            return 0.0
+
+    async def refund(self, key: str, window: float):
+        """Take back one counted attempt (from the previous window if the current is empty)."""
+        idx = int(time.time() // window)
+        with self._lock:
+            w = self._windows.get(key)
+            if w is None or w[0] < idx - 1:
+                return
+            if w[0] == idx - 1:
+                w[:] = [idx, 0, w[1]]
+            if w[1] > 0:
+                w[1] -= 1
+            elif w[2] > 0:
+                w[2] -= 1
+
+    def _sweep(self, idx: int):
+        for k in [k for k, w in self._windows.items() if w[0] < idx - 1]:
+            del self._windows[k]
+
+
+# KEYS: current window, previous window. ARGV: previous-window weight, limit, TTL.
+# Check and count in one step, so concurrent attempts cannot all slip under the limit.
+_HIT_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+_REFUND_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if tonumber(redis.call('GET', key) or '0') > 0 then
+        redis.call('DECR', key)
+        return 1
+    end
+end
+return 0
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Same sliding-window counter kept in Redis (asyncio client, one Lua script per
+    check), so every worker and host sees the same counts. Requires the optional
+    `redis` package.
+
+    If Redis is unreachable the backend fails open to per-process limits: counts
+    go to an in-memory fallback until Redis answers again, so an outage neither
+    locks every user out nor turns logins into errors.
+    """
+
+    def __init__(self, url: str, prefix: str = "his:ratelimit", timeout: float = 0.5):
+        try:
+            import redis.asyncio as redis_asyncio
+            from redis.exceptions import RedisError
+        except ImportError as exc:
+            raise RuntimeError("LOGIN_RATE_BACKEND=redis requires the 'redis' package") from exc
+        self._redis = redis_asyncio.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._hit = self._redis.register_script(_HIT_SCRIPT)
+        self._refund = self._redis.register_script(_REFUND_SCRIPT)
+        self._errors = (RedisError, OSError)
+        self._prefix = prefix
+        self.fallback = InMemoryRateLimitBackend()
+        self.degraded = False
+        self.errors = 0
+
+    def _keys(self, key: str, window: float):
+        idx = int(time.time() // window)
+        return f"{self._prefix}:{key}:{idx}", f"{self._prefix}:{key}:{idx - 1}"
+
+    def _failed(self, exc: Exception):
+        self.errors += 1
+        if not self.degraded:
+            self.degraded = True
+            logger.warning("Rate limit store unreachable, using per-process limits: %s", exc)
+
+    def _recovered(self):
+        if self.degraded:
+            self.degraded = False
+            logger.warning("Rate limit store reachable again")
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        into_window = (now % window) / window
+        cur_key, prev_key = self._keys(key, window)
+        try:
+            allowed = await self._hit(keys=[cur_key, prev_key], args=[1 - into_window, limit, math.ceil(window * 2)])
+        except self._errors as exc:
+            self._failed(exc)
+            return await self.fallback.hit(key, limit, window)
+        self._recovered()
+        return 0.0 if allowed else window * (1 - into_window)
+
+    async def refund(self, key: str, window: float):
+        try:
+            await self._refund(keys=list(self._keys(key, window)))
+        except self._errors as exc:
+            self._failed(exc)
+            await self.fallback.refund(key, window)
+
+
+class LoginThrottle:
+    """
+    Pre-hash admission control for /auth/login: each attempt is counted against
+    its client IP and its username, and refused once either is over its limit.
+    A successful login gives its attempt back (`release`), so only failures
+    use up the budget and people who log in often are never locked out.
+    """
+
+    def __init__(self, backend, window: float, per_username: int, per_ip: int):
+        self.backend = backend
+        self.window = window
+        self.per_username = per_username
+        self.per_ip = per_ip
+        self.allowed = 0
+        self.rejected_username = 0
+        self.rejected_ip = 0
+
+    async def check(self, username: str, client_ip: str | None) -> float:
+        """Count the attempt; 0 if it may proceed, else seconds the client should wait."""
+        ip_counted = bool(client_ip and self.per_ip > 0)
+        if ip_counted:
+            retry = await self.backend.hit(f"ip:{client_ip}", self.per_ip, self.window)
+            if retry:
+                self.rejected_ip += 1
+                return retry
+        if self.per_username > 0:
+            retry = await self.backend.hit(self._user_key(username), self.per_username, self.window)
+            if retry:
+                self.rejected_username += 1
+                # A locked account must not use up the budget of everyone behind the same IP
+                if ip_counted:
+                    await self.backend.refund(f"ip:{client_ip}", self.window)
+                return retry
+        self.allowed += 1
+        return 0.0
+
+    async def release(self, username: str, client_ip: str | None):
+        """
+        Refund a checked attempt that did not fail: a successful login, or one the
+        server could not check (e.g. the hashing pool was saturated).
+        """
+        if client_ip and self.per_ip > 0:
+            await self.backend.refund(f"ip:{client_ip}", self.window)
+        if self.per_username > 0:
+            await self.backend.refund(self._user_key(username), self.window)
+
+    @staticmethod
+    def _user_key(username: str) -> str:
+        return f"user:{username.strip().lower()}"
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "window_seconds": self.window,
+            "per_username": self.per_username,
+            "per_ip": self.per_ip,
+            "allowed": self.allowed,
+            "rejected_username": self.rejected_username,
+            "rejected_ip": self.rejected_ip,
+            "store_errors": getattr(self.backend, "errors", 0),
+            "degraded": getattr(self.backend, "degraded", False),
+        }
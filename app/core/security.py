@@ -1,19 +1,22 @@
+import asyncio
 import bcrypt
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.core import config
+from app.core.metrics import record_kdf
 
 SECRET_KEY = os.getenv("SECRET_KEY", "9fbaa69d52eda5419a44a82a1afae03fcf99a37672fcb3ae7545b0d68b83cb07")
 ALGORITHM = "HS256"
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int = None) -> str:
     # Convert string to bytes
     pwd_bytes = password.encode('utf-8')
-    # Generate salt and hash
-    salt = bcrypt.gensalt()
+    # Generate salt and hash at the configured work factor
+    salt = bcrypt.gensalt(rounds=rounds or config.BCRYPT_ROUNDS)
     hashed_password = bcrypt.hashpw(pwd_bytes, salt)
     # Return as string to store in DB
     return hashed_password.decode('utf-8')
@@ -24,6 +27,80 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def hash_rounds(hashed_password: str) -> int | None:
+    """Work factor of a bcrypt hash ("$2b$12$..." -> 12), or None if unrecognised."""
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash does not match the configured cost (upgrade or downgrade)."""
+    return hash_rounds(hashed_password) != config.BCRYPT_ROUNDS
+
+# --- Dedicated KDF pool ---
+class KDFBusyError(Exception):
+    """Raised when the hashing pool already has KDF_MAX_PENDING jobs in flight."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+if config.KDF_EXECUTOR == "process":
+    _kdf_pool = ProcessPoolExecutor(max_workers=config.KDF_WORKERS)
+else:
+    _kdf_pool = ThreadPoolExecutor(max_workers=config.KDF_WORKERS, thread_name_prefix="kdf")
+_kdf_slots = threading.BoundedSemaphore(config.KDF_MAX_PENDING)
+
+
+async def _run_kdf(fn, *args):
+    # Refuse instead of queueing forever; the API turns this into 503 + Retry-After
+    if not _kdf_slots.acquire(blocking=False):
+        raise KDFBusyError(config.KDF_RETRY_AFTER_SECONDS)
+    start = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(_kdf_pool.submit(fn, *args))
+    finally:
+        _kdf_slots.release()
+        record_kdf(time.perf_counter() - start)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_kdf(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_kdf(verify_password, plain_password, hashed_password)
+
+
+async def warm_kdf_pool():
+    """Start every KDF worker now (process workers spawn on demand) so the first logins don't pay for it."""
+    await asyncio.gather(*(
+        asyncio.wrap_future(_kdf_pool.submit(hash_rounds, "")) for _ in range(config.KDF_WORKERS)
+    ))
+
+
+def hash_passwords(passwords: list) -> list:
+    """Hash a batch on the KDF pool (all cores); for scripts and other sync callers."""
+    return list(_kdf_pool.map(hash_password, passwords))
+
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    Hash a batch on the KDF pool, at most KDF_WORKERS at a time so logins submitted
+    meanwhile interleave with it instead of waiting behind the whole batch.
+    The batch does not count against KDF_MAX_PENDING.
+    """
+    window = asyncio.Semaphore(config.KDF_WORKERS)
+
+    async def _one(password):
+        async with window:
+            return await asyncio.wrap_future(_kdf_pool.submit(hash_password, password))
+
+    return await asyncio.gather(*(_one(p) for p in passwords))
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=60)
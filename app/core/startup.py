@@ -0,0 +1,84 @@
+"""
+Cold-start timing for this worker: how long importing the application took,
+each warm-up step of the lifespan hook, and the total until it was ready to
+serve. Logged once per worker, served on GET /admin/startup and exported on
+/metrics, so autoscaled workers can be held to STARTUP_TARGET_SECONDS.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from app import IMPORT_STARTED
+from app.core import config
+from app.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age():
+    """Seconds since this process started (Linux /proc), or None elsewhere."""
+    try:
+        with open("/proc/self/stat") as fh:
+            fields = fh.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupReport:
+    def __init__(self, started: float):
+        self._started = started
+        self.import_seconds = None
+        self.ready_seconds = None
+        self.process_seconds = None  # includes interpreter and server start-up
+        self.phases = {}
+
+    def imported(self):
+        """Call once app.main has finished importing."""
+        self.import_seconds = time.perf_counter() - self._started
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def ready(self):
+        """Call at the end of the lifespan startup; logs the report."""
+        self.ready_seconds = time.perf_counter() - self._started
+        self.process_seconds = _process_age()
+        phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items())
+        message = "Startup: imports %.3fs, ready after %.3fs%s (%s)" % (
+            self.import_seconds or 0, self.ready_seconds,
+            "" if self.process_seconds is None else f", {self.process_seconds:.3f}s since process start",
+            phases or "no warm-up",
+        )
+        target = config.STARTUP_TARGET_SECONDS
+        if target and self.ready_seconds > target:
+            logger.warning("%s exceeds STARTUP_TARGET_SECONDS=%s", message, target)
+        else:
+            logger.info(message)
+
+    def as_dict(self) -> dict:
+        return {
+            "import_seconds": self.import_seconds,
+            "ready_seconds": self.ready_seconds,
+            "since_process_start_seconds": self.process_seconds,
+            "phases": dict(self.phases),
+            "target_seconds": config.STARTUP_TARGET_SECONDS or None,
+        }
+
+    def gauge(self) -> Gauge:
+        gauge = Gauge("app_startup_seconds", "Worker cold start: imports, warm-up steps and ready.", ("phase",))
+        for name, seconds in (("import", self.import_seconds), ("ready", self.ready_seconds), *self.phases.items()):
+            if seconds is not None:
+                gauge.set((name,), seconds)
+        return gauge
+
+
+startup = StartupReport(IMPORT_STARTED)
@@ -1,13 +1,343 @@
+import base64
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.orm import Session
+
+from app.core import config
+from app.database import AsyncSessionLocal, SessionLocal
 from app.models.audit import AuditLog
 
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Background audit sink: events are queued in memory and written by a single
+    worker thread as one multi-row INSERT per batch (every `batch_size` events
+    or `flush_interval_ms`, whichever comes first).
+
+    Backpressure: the queue is bounded. When it is full, `submit` returns False
+    and the caller writes the event synchronously, so audit rows are never dropped
+    and a flooded writer slows callers down instead of growing memory.
+
+    A batch whose INSERT fails is retried once after `retry_delay` seconds (a
+    dropped connection, a failover), then written row by row so one bad row
+    cannot take the rest with it. Only rows that still fail are logged, in
+    full, and counted in `failed`.
+    """
+
+    retry_delay = 0.5
+
+    def __init__(self, session_factory, batch_size: int, flush_interval_ms: int, max_queue: int):
+        self._session_factory = session_factory
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = max(1, flush_interval_ms) / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._hooks = []
+        self.written = 0
+        self.overflowed = 0
+        self.failed = 0
+
+    def add_flush_hook(self, hook):
+        """
+        Register `hook(force: bool) -> list[row]`, polled by the worker on every
+        cycle (and with force=True on stop); returned rows are written as a batch.
+        """
+        self._hooks.append(hook)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker after it has written everything already queued."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        # Anything left (e.g. the join timed out) is written from this thread.
+        self._drain()
+        self._run_hooks(force=True)
+
+    def submit(self, row: dict) -> bool:
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.overflowed += 1
+            return False
+
+    def flush(self):
+        """Block until every event queued (or aggregated) so far has been written."""
+        if self.running:
+            self._queue.join()
+        else:
+            self._drain()
+        self._run_hooks(force=True)
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self._batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _run_hooks(self, force: bool = False):
+        for hook in self._hooks:
+            try:
+                rows = hook(force)
+            except Exception:
+                logger.exception("Audit flush hook failed")
+                continue
+            if rows:
+                self._write(rows, queued=False)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            self._run_hooks()
+            try:
+                batch = [self._queue.get(timeout=self._flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: list, queued: bool = True):
+        try:
+            error = self._insert(batch)
+            if error is None:
+                return
+            logger.warning("Failed to write %d audit events, retrying: %s", len(batch), error)
+            time.sleep(self.retry_delay)
+            if self._insert(batch) is None:
+                return
+            for row in batch:
+                error = self._insert([row])
+                if error is not None:
+                    self.failed += 1
+                    logger.error("Audit event could not be written and was dropped: %r (%s)", row, error)
+        finally:
+            if queued:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _insert(self, rows: list):
+        """INSERT `rows` in one transaction; returns the exception on failure, else None."""
+        db = self._session_factory()
+        try:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+            self.written += len(rows)
+            return None
+        except Exception as exc:
+            db.rollback()
+            return exc
+        finally:
+            db.close()
+
+
+audit_writer = AuditWriter(
+    SessionLocal,
+    batch_size=config.AUDIT_BATCH_SIZE,
+    flush_interval_ms=config.AUDIT_FLUSH_INTERVAL_MS,
+    max_queue=config.AUDIT_QUEUE_MAX,
+)
+
 
 def log_event(db: Session, user_id: int | None, action: str, resource_id: str = None, ip_address: str = None):
-    db_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_id=resource_id,
-        ip_address=ip_address,
-    )
-    db.add(db_log)
-    db.commit()
\ No newline at end of file
+    row = {
+        "user_id": user_id,
+        "action": action,
+        "resource_id": resource_id,
+        "ip_address": ip_address,
+        # Stamp at call time; a queued event may be written a few ms later.
+        "timestamp": datetime.utcnow(),
+    }
+    if audit_writer.running and audit_writer.submit(row):
+        return
+    # Writer not started (scripts, tests without lifespan) or queue full: write inline.
+    db.add(AuditLog(**row))
+    db.commit()
+
+
+class LoginFailureAggregator:
+    """
+    Folds repeated failed or throttled logins for the same (action, username, IP)
+    into one audit row per interval, e.g. "LOGIN_FAILED: bob (x37)", so a password
+    spray cannot turn into an audit-table write storm. Flushed by the audit writer.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self._interval = interval_seconds
+        self._lock = threading.Lock()
+        self._counts = {}  # (action, username, ip) -> [count, first_seen]
+        self._window_start = time.monotonic()
+
+    def add(self, action: str, username: str, ip_address: str | None):
+        with self._lock:
+            entry = self._counts.get((action, username, ip_address))
+            if entry is None:
+                self._counts[(action, username, ip_address)] = [1, datetime.utcnow()]
+            else:
+                entry[0] += 1
+
+    def flush(self, force: bool = False) -> list:
+        now = time.monotonic()
+        with self._lock:
+            if not self._counts or (not force and now - self._window_start < self._interval):
+                return []
+            counts, self._counts = self._counts, {}
+            self._window_start = now
+        return [
+            {
+                "user_id": None,
+                "action": f"{action}: {username}" + (f" (x{count})" if count > 1 else ""),
+                "resource_id": None,
+                "ip_address": ip_address,
+                "timestamp": first_seen,
+            }
+            for (action, username, ip_address), (count, first_seen) in counts.items()
+        ]
+
+
+login_failures = LoginFailureAggregator(config.LOGIN_FAIL_AUDIT_INTERVAL_SECONDS)
+audit_writer.add_flush_hook(login_failures.flush)
+
+
+def log_login_failure(db: Session, action: str, username: str, ip_address: str = None):
+    """Audit a failed/throttled login: aggregated while the writer runs, inline otherwise."""
+    if audit_writer.running:
+        login_failures.add(action, username, ip_address)
+    else:
+        log_event(db, None, f"{action}: {username}", ip_address=ip_address)
+
+
+def log_events(db: Session, events: list):
+    """
+    Log several events at once (dicts with user_id, action and optional resource_id,
+    ip_address). Queued like log_event; anything written inline goes out as a single
+    multi-row INSERT and one commit rather than one per event.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": e.get("user_id"),
+            "action": e["action"],
+            "resource_id": e.get("resource_id"),
+            "ip_address": e.get("ip_address"),
+            "timestamp": now,
+        }
+        for e in events
+    ]
+    if audit_writer.running:
+        rows = [r for r in rows if not audit_writer.submit(r)]
+    if rows:
+        db.execute(insert(AuditLog), rows)
+        db.commit()
+
+
+# --- Audit log queries ---
+# Lightweight column projection used by list/export endpoints (rows come back as tuples)
+AUDIT_COLUMNS = (
+    AuditLog.id,
+    AuditLog.user_id,
+    AuditLog.action,
+    AuditLog.resource_id,
+    AuditLog.ip_address,
+    AuditLog.timestamp,
+)
+
+
+def _as_naive_utc(value: datetime | None):
+    # timestamps are stored as naive UTC (datetime.utcnow)
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def audit_log_select(
+    user_id: int = None,
+    action: str = None,
+    resource_id: str = None,
+    ip_address: str = None,
+    since: datetime = None,
+    until: datetime = None,
+    before: tuple = None,
+    newest_first: bool = True,
+):
+    """
+    SELECT over audit_logs (newest first unless `newest_first=False`) with optional filters.
+    `action` matches by prefix (e.g. "LOGIN_FAILED" matches "LOGIN_FAILED: bob");
+    `since` is inclusive, `until` exclusive; `before` is a (timestamp, id) keyset cursor.
+    """
+    stmt = select(*AUDIT_COLUMNS)
+    if user_id is not None:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if action:
+        stmt = stmt.where(AuditLog.action.startswith(action, autoescape=True))
+    if resource_id is not None:
+        stmt = stmt.where(AuditLog.resource_id == resource_id)
+    if ip_address is not None:
+        stmt = stmt.where(AuditLog.ip_address == ip_address)
+    if since is not None:
+        stmt = stmt.where(AuditLog.timestamp >= _as_naive_utc(since))
+    if until is not None:
+        stmt = stmt.where(AuditLog.timestamp < _as_naive_utc(until))
+    if before is not None:
+        stmt = stmt.where(tuple_(AuditLog.timestamp, AuditLog.id) < tuple_(*before))
+    if not newest_first:
+        return stmt.order_by(AuditLog.timestamp, AuditLog.id)
+    return stmt.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+
+
+async def stream_audit_rows(stmt, batch_size: int = 1000):
+    """
+    Yield lists of up to `batch_size` row tuples for `stmt` through a server-side
+    cursor, so memory stays flat however many rows match. Uses its own session
+    because it outlives the request's dependency-scoped one when streaming.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+def encode_audit_cursor(timestamp: datetime, log_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_audit_cursor(cursor: str) -> tuple:
+    """Inverse of encode_audit_cursor; raises ValueError on malformed input."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    ts, log_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(ts), int(log_id)
@@ -0,0 +1,86 @@
+"""
+Maintenance for the monthly range-partitioned audit_logs table (Postgres only,
+see alembic/versions/0003_partition_audit_logs.py). Partitions are named
+audit_logs_pYYYYMM and cover [first of month, first of next month).
+"""
+import gzip
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from app.core.pgcopy import copy_to
+
+PARTITION_RE = re.compile(r"^audit_logs_p(\d{4})(\d{2})$")
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def ensure_partitions(conn, months_ahead: int = 3) -> int:
+    """Create any missing partitions from this month to `months_ahead` months out."""
+    return conn.execute(text("SELECT audit_logs_ensure_partitions(:n)"), {"n": months_ahead}).scalar()
+
+
+def ensure_partitions_job(db) -> int:
+    """Maintenance job: ensure_partitions through the scheduler's session, once migration 0003 is in."""
+    if db.execute(text("SELECT to_regproc('audit_logs_ensure_partitions')")).scalar() is None:
+        return 0
+    created = ensure_partitions(db.connection())
+    db.commit()
+    return created or 0
+
+
+def list_partitions(conn):
+    """Return [(name, lower_bound, upper_bound)] for the monthly partitions, oldest first."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'audit_logs'::regclass"
+    )).scalars()
+    parts = []
+    for name in rows:
+        m = PARTITION_RE.match(name)
+        if m:
+            lower = date(int(m.group(1)), int(m.group(2)), 1)
+            parts.append((name, lower, _next_month(lower)))
+    return sorted(parts, key=lambda p: p[1])
+
+
+def archive_partition(conn, name: str, out_dir: str) -> tuple:
+    """
+    Detach partition `name`, write its rows to `<out_dir>/<name>.csv.gz` and drop it.
+    Run inside a transaction: if the export fails, the partition stays attached.
+    Returns (path, row_count).
+    """
+    if not PARTITION_RE.match(name):
+        raise ValueError(f"Not an audit_logs monthly partition: {name}")
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{name}.csv.gz")
+    count = conn.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+    conn.execute(text(f'ALTER TABLE audit_logs DETACH PARTITION "{name}"'))
+    with gzip.open(path, "wb") as fh:
+        copy_to(
+            conn.connection.dbapi_connection,
+            f'COPY (SELECT id, user_id, action, resource_id, ip_address, "timestamp" FROM "{name}" ORDER BY "timestamp", id) '
+            f"TO STDOUT WITH (FORMAT csv, HEADER true)",
+            fh,
+        )
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    return path, count
+
+
+def archive_older_than(engine, cutoff: date, out_dir: str, dry_run: bool = False):
+    """Archive every partition whose whole range ends on or before `cutoff`, one transaction each."""
+    with engine.connect() as conn:
+        candidates = [p for p in list_partitions(conn) if p[2] <= cutoff]
+    results = []
+    for name, _, _ in candidates:
+        if dry_run:
+            results.append((name, None, None))
+            continue
+        with engine.begin() as conn:
+            path, count = archive_partition(conn, name, out_dir)
+        results.append((name, path, count))
+    return results
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.models.break_glass import BreakGlassGrant
+
+# (user_id, patient_id) -> {"id", "reason", "expires_at"}; entries live until the grant expires
+grant_cache = TTLCache(config.BREAK_GLASS_CACHE_MAX, config.BREAK_GLASS_GRANT_MINUTES * 60)
+
+
+def _cache_grant(grant: dict):
+    remaining = (grant["expires_at"] - datetime.utcnow()).total_seconds()
+    grant_cache.set((grant["user_id"], grant["patient_id"]), grant, ttl=remaining)
+
+
+def _as_dict(grant: BreakGlassGrant) -> dict:
+    return {
+        "id": grant.id,
+        "user_id": grant.user_id,
+        "patient_id": grant.patient_id,
+        "reason": grant.reason,
+        "expires_at": grant.expires_at,
+    }
+
+
+def _active_grant_select(user_id: int, patient_id: int):
+    return (
+        select(BreakGlassGrant)
+        .where(
+            BreakGlassGrant.user_id == user_id,
+            BreakGlassGrant.patient_id == patient_id,
+            BreakGlassGrant.active.is_(True),
+            BreakGlassGrant.expires_at > datetime.utcnow(),
+        )
+        .order_by(BreakGlassGrant.expires_at.desc())
+        .limit(1)
+    )
+
+
+async def get_active_grant(db, user_id: int, patient_id: int):
+    """Active grant for user+patient: in-process cache first, then the indexed table."""
+    grant = grant_cache.get((user_id, patient_id))
+    if grant is not None:
+        return grant
+    result = await db.execute(_active_grant_select(user_id, patient_id))
+    row = result.scalar_one_or_none()
+    if row is None:
+        return None
+    grant = _as_dict(row)
+    _cache_grant(grant)
+    return grant
+
+
+async def issue_grant(db, user_id: int, patient_id: int, reason: str) -> tuple:
+    """
+    Open a grant for user+patient -> (grant, created). The expired grant it replaces
+    is retired in the same transaction. When a concurrent request opened one first,
+    the partial unique index rejects this insert and that grant is returned instead.
+    """
+    now = datetime.utcnow()
+    await db.execute(
+        update(BreakGlassGrant)
+        .where(
+            BreakGlassGrant.user_id == user_id,
+            BreakGlassGrant.patient_id == patient_id,
+            BreakGlassGrant.active.is_(True),
+            BreakGlassGrant.expires_at <= now,
+        )
+        .values(active=False)
+    )
+    row = BreakGlassGrant(
+        user_id=user_id,
+        patient_id=patient_id,
+        reason=reason,
+        created_at=now,
+        expires_at=now + timedelta(minutes=config.BREAK_GLASS_GRANT_MINUTES),
+        active=True,
+    )
+    db.add(row)
+    created = True
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        row = (await db.execute(_active_grant_select(user_id, patient_id))).scalar_one_or_none()
+        if row is None:
+            raise
+        created = False
+    grant = _as_dict(row)
+    _cache_grant(grant)
+    return grant, created
@@ -1,3 +1,4 @@
+from sqlalchemy import delete, or_, select
 from sqlalchemy.orm import Session
 from app.models.password_reset import PasswordResetToken
 from datetime import datetime
@@ -30,7 +31,27 @@ def mark_token_used(db: Session, token_id: int):
     return token
 
 
-def purge_expired(db: Session):
+def purge_expired(db: Session, batch_size: int = 1000, max_batches: int = None) -> int:
+    """
+    Delete expired and used tokens, `batch_size` rows per DELETE/commit so the purge
+    never holds long locks on the table. Returns the number of rows removed.
+    """
     now = datetime.utcnow()
-    db.query(PasswordResetToken).filter(PasswordResetToken.expires_at < now).delete()
-    db.commit()
+    dead_ids = (
+        select(PasswordResetToken.id)
+        .where(or_(PasswordResetToken.expires_at < now, PasswordResetToken.used_at.is_not(None)))
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    removed = batches = 0
+    while max_batches is None or batches < max_batches:
+        deleted = db.execute(
+            delete(PasswordResetToken).where(PasswordResetToken.id.in_(dead_ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.commit()
+        removed += deleted
+        batches += 1
+        if deleted < batch_size:
+            break
+    return removed
@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import timezone
+from email.utils import format_datetime
+
+from sqlalchemy import event, func, select, tuple_
+from sqlalchemy.orm import Session, object_session
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.models.patient import Patient
+
+# Search results never include medical_history
+PATIENT_SUMMARY_COLUMNS = (Patient.id, Patient.full_name, Patient.updated_at)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so `value` only ever matches literally (escape char: backslash)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def patient_search_select(q: str, match: str = "prefix", dialect: str = "postgresql", after: tuple = None):
+    """
+    Name search over patients, keyset-paginated via `after` (full_name, id).
+    match="prefix": case-insensitive prefix of full_name, ordered by (lower(full_name), id)
+    so one btree (migration 0008) serves the match, the order and the LIMIT.
+    match="fuzzy": pg_trgm similarity on Postgres (trigram index from migration 0004);
+    substring match elsewhere (e.g. SQLite). Ordered by (full_name, id).
+    """
+    stmt = select(*PATIENT_SUMMARY_COLUMNS)
+    if match == "fuzzy":
+        if dialect == "postgresql":
+            stmt = stmt.where(Patient.full_name.op("%")(q))
+        else:
+            stmt = stmt.where(Patient.full_name.icontains(q, autoescape=True))
+        if after is not None:
+            stmt = stmt.where(tuple_(Patient.full_name, Patient.id) > tuple_(*after))
+        return stmt.order_by(Patient.full_name, Patient.id)
+
+    name_key = func.lower(Patient.full_name)
+    if dialect == "postgresql":
+        # Byte order, like the index: a "C" btree can serve LIKE 'x%' as a range scan
+        name_key = name_key.collate("C")
+    # Bind the finished pattern ('smi%'), not `:q || '%'`, so the planner sees a constant prefix
+    stmt = stmt.where(name_key.like(func.lower(_escape_like(q) + "%"), escape="\\"))
+    if after is not None:
+        stmt = stmt.where(tuple_(name_key, Patient.id) > tuple_(func.lower(after[0]), after[1]))
+    return stmt.order_by(name_key, Patient.id)
+
+
+def encode_patient_cursor(full_name: str, patient_id: int) -> str:
+    raw = json.dumps([full_name, patient_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_patient_cursor(cursor: str) -> tuple:
+    """Inverse of encode_patient_cursor; raises ValueError on malformed input."""
+    name, patient_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if not isinstance(name, str) or not isinstance(patient_id, int):
+        raise ValueError("Malformed cursor")
+    return name, patient_id
+
+
+# --- Patient record read cache ---
+# Read-through cache for GET /patients/{id}, keyed by patient id. ORM writes to a
+# Patient in this process invalidate it (see the listeners below); the TTL bounds
+# staleness from writes made elsewhere (other workers, scripts).
+patient_cache = TTLCache(config.PATIENT_CACHE_MAX, config.PATIENT_CACHE_TTL_SECONDS)
+
+
+def patient_record(patient: Patient) -> dict:
+    return {
+        "id": patient.id,
+        "full_name": patient.full_name,
+        "medical_history": patient.medical_history,
+        "updated_at": patient.updated_at,
+    }
+
+
+def patient_validators(record: dict) -> tuple:
+    """(ETag, Last-Modified) for a cached record, derived from id and updated_at."""
+    patient_id, updated_at = record["id"], record["updated_at"]
+    if updated_at is None:
+        return f'"p{patient_id}-0"', None
+    updated_at = updated_at.replace(tzinfo=timezone.utc)
+    version = int(updated_at.timestamp() * 1_000_000)
+    return f'"p{patient_id}-{version}"', format_datetime(updated_at, usegmt=True)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+async def load_patients(db, patient_ids: list) -> dict:
+    """
+    {id: record} for the requested ids that exist: cache hits first, then the
+    rest with a single IN query (whose results are cached in turn).
+    """
+    found = {}
+    misses = []
+    for patient_id in patient_ids:
+        record = patient_cache.get(patient_id)
+        if record is None:
+            misses.append(patient_id)
+        else:
+            found[patient_id] = record
+    if misses:
+        result = await db.execute(select(Patient).where(Patient.id.in_(misses)))
+        for patient in result.scalars():
+            record = patient_record(patient)
+            patient_cache.set(patient.id, record)
+            found[patient.id] = record
+    return found
+
+
+def invalidate_patient(patient_id: int):
+    patient_cache.invalidate(patient_id)
+
+
+@event.listens_for(Patient, "after_update")
+@event.listens_for(Patient, "after_delete")
+def _patient_written(mapper, connection, target):
+    invalidate_patient(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("written_patient_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_patients(session):
+    # Again after commit: a concurrent reader may have re-cached the old row between flush and commit
+    for patient_id in session.info.pop("written_patient_ids", ()):
+        invalidate_patient(patient_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_patients(session):
+    session.info.pop("written_patient_ids", None)
@@ -0,0 +1,175 @@
+"""
+Streaming, resumable patient import from CSV or NDJSON.
+
+Records are read one at a time and loaded in chunks: COPY on Postgres, multi-row
+executemany elsewhere. Each chunk commits together with its checkpoint row in
+patient_imports, so re-running a job with the same id and file skips exactly the
+records that were already committed, and memory stays flat whatever the file size.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.pgcopy import copy_from
+from app.models.patient import Patient
+from app.models.patient_import import PatientImport
+
+FORMATS = ("csv", "ndjson")
+MAX_NAME_LENGTH = 200
+MAX_HISTORY_LENGTH = 100_000
+
+
+class ImportFormatError(ValueError):
+    """The file itself is unreadable (bad encoding, broken CSV); the job can be resumed."""
+
+
+def iter_records(fileobj, fmt: str):
+    """Yield (record_no, dict or error string) from a text stream, one record at a time."""
+    if fmt == "csv":
+        reader = csv.DictReader(fileobj)
+        for no, row in enumerate(reader, start=1):
+            yield no, row
+    elif fmt == "ndjson":
+        no = 0
+        for line in fileobj:
+            if not line.strip():
+                continue
+            no += 1
+            try:
+                yield no, json.loads(line)
+            except ValueError:
+                yield no, "invalid JSON"
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+
+
+def validate_record(record) -> tuple:
+    """Return (row, None) for a valid record or (None, reason)."""
+    if not isinstance(record, dict):
+        return None, record if isinstance(record, str) else "record is not an object"
+    name = record.get("full_name")
+    if not isinstance(name, str) or not name.strip():
+        return None, "full_name is required"
+    name = name.strip()
+    if len(name) > MAX_NAME_LENGTH:
+        return None, f"full_name longer than {MAX_NAME_LENGTH} characters"
+    history = record.get("medical_history")
+    if history is not None and not isinstance(history, str):
+        return None, "medical_history must be a string"
+    if history and len(history) > MAX_HISTORY_LENGTH:
+        return None, f"medical_history longer than {MAX_HISTORY_LENGTH} characters"
+    return {"full_name": name, "medical_history": history or None}, None
+
+
+def _load_chunk(db: Session, rows: list):
+    if db.bind.dialect.name == "postgresql":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in rows:
+            # Unquoted empty field = NULL in COPY's csv format
+            writer.writerow((r["full_name"], r["medical_history"], r["updated_at"].isoformat()))
+        buf.seek(0)
+        copy_from(
+            db.connection().connection.dbapi_connection,
+            "COPY patients (full_name, medical_history, updated_at) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+    else:
+        db.execute(insert(Patient), rows)
+
+
+def import_patients(
+    db: Session,
+    fileobj,
+    fmt: str,
+    job_id: str,
+    source: str = None,
+    chunk_size: int = 5000,
+    restart: bool = False,
+    on_progress=None,
+    on_reject=None,
+) -> dict:
+    """
+    Import patients from text stream `fileobj` under checkpoint `job_id`.
+    Resumes after the last committed chunk unless `restart`; a finished job is not
+    loaded again. `on_progress(summary)` runs after every chunk, `on_reject(record_no,
+    reason, record)` for each invalid record. Returns the job summary.
+    """
+    job = db.get(PatientImport, job_id)
+    if job is None:
+        job = PatientImport(job_id=job_id, started_at=datetime.utcnow())
+        db.add(job)
+        restart = True
+    if restart:
+        job.source, job.records, job.imported, job.rejected, job.status = source, 0, 0, 0, "running"
+        job.updated_at = datetime.utcnow()
+        db.commit()
+    resumed_from = job.records
+    if job.status == "done":
+        return _summary(job, resumed_from)
+
+    rows = []
+    seen = pending = rejected = 0
+    try:
+        for no, record in iter_records(fileobj, fmt):
+            if no <= resumed_from:
+                continue
+            seen = no
+            pending += 1
+            row, reason = validate_record(record)
+            if row is None:
+                rejected += 1
+                if on_reject:
+                    on_reject(no, reason, record)
+            else:
+                rows.append(row)
+            if pending >= chunk_size:
+                _commit_chunk(db, job, rows, seen, rejected)
+                rows, pending, rejected = [], 0, 0
+                if on_progress:
+                    on_progress(_summary(job, resumed_from))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        db.rollback()
+        raise ImportFormatError(f"Unreadable input after record {job.records}: {exc}") from exc
+
+    if pending:
+        _commit_chunk(db, job, rows, seen, rejected)
+    job.status = "done"
+    db.commit()
+    summary = _summary(job, resumed_from)
+    if on_progress:
+        on_progress(summary)
+    return summary
+
+
+def _commit_chunk(db: Session, job: PatientImport, rows: list, records: int, rejected: int):
+    now = datetime.utcnow()
+    if rows:
+        for r in rows:
+            r["updated_at"] = now
+        _load_chunk(db, rows)
+    job.records = records
+    job.imported += len(rows)
+    job.rejected += rejected
+    job.updated_at = now
+    db.commit()  # rows and checkpoint together
+
+
+def _summary(job: PatientImport, resumed_from: int) -> dict:
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "records": job.records,
+        "imported": job.imported,
+        "rejected": job.rejected,
+        "resumed_from": resumed_from,
+    }
+
+
+def get_import(db: Session, job_id: str):
+    job = db.get(PatientImport, job_id)
+    return None if job is None else _summary(job, None)
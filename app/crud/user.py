@@ -1,17 +1,93 @@
-from app.models.user import User
+import base64
+from typing import NamedTuple
+from sqlalchemy import insert, select, update
+from app.models.user import User, Role
+from app.models.user_flags import UserFlags
+from app.core import config
+from app.core.cache import TTLCache
 from app.core.security import hash_password
 
-def create_user(db, username: str, password: str, role_id: int):
+
+class Principal(NamedTuple):
+    """What login needs about a user, loaded in one joined query. Never holds the password hash."""
+    id: int
+    username: str
+    role_name: str | None
+    must_change_password: bool
+
+
+principal_cache = TTLCache(config.PRINCIPAL_CACHE_MAX, config.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def _principal_key(username: str) -> str:
+    return username.strip().lower()
+
+
+def get_login_principal(db, username: str):
+    """
+    Return (Principal, password hash) for `username` (exact match, as login always
+    did), or (None, None). The Principal is cached by normalized username until
+    invalidated; the hash is read from the database on every call, so a password
+    change made on any worker applies to the next login everywhere.
+    """
+    cached = principal_cache.get(_principal_key(username))
+    if cached is not None and cached.username == username:
+        hashed = db.execute(
+            select(User.hashed_password).where(User.id == cached.id, User.username == username)
+        ).scalar()
+        if hashed is not None:
+            return cached, hashed
+        invalidate_principal(username=username)  # deleted or renamed since it was cached
+
+    row = (
+        db.query(User.id, User.username, User.hashed_password, Role.role_name, UserFlags.must_change_password)
+        .outerjoin(Role, User.role_id == Role.id)
+        .outerjoin(UserFlags, UserFlags.user_id == User.id)
+        .filter(User.username == username)
+        .first()
+    )
+    if row is None:
+        return None, None
+    principal = Principal(row.id, row.username, row.role_name, bool(row.must_change_password))
+    principal_cache.set(_principal_key(username), principal)
+    return principal, row.hashed_password
+
+
+def invalidate_principal(username: str = None, user_id: int = None):
+    """Drop cached principals after a password, role or flag change."""
+    if username:
+        principal_cache.invalidate(_principal_key(username))
+    if user_id is not None:
+        principal_cache.invalidate_where(lambda p: p.id == user_id)
+
+
+def rehash_password(db, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """
+    Replace a user's hash with one at the current cost, but only if the stored
+    hash is still `old_hash` (a password reset in the meantime wins).
+    """
+    updated = (
+        db.query(User)
+        .filter(User.id == user_id, User.hashed_password == old_hash)
+        .update({User.hashed_password: new_hash}, synchronize_session=False)
+    )
+    db.commit()
+    return bool(updated)
+
+
+def create_user(db, username: str, password: str, role_id: int, hashed_password: str = None):
     """
     Create a new User with hashed password.
+    Pass `hashed_password` when the hash was already computed (e.g. on the KDF pool).
     Returns the User instance after committing to DB.
     """
     username = username.strip() if username else username
-    hashed_pwd = hash_password(password)
+    hashed_pwd = hashed_password or hash_password(password)
     user = User(username=username, hashed_password=hashed_pwd, role_id=role_id)
     db.add(user)
     db.commit()
     db.refresh(user)  # important to get the DB-generated ID and relationship
+    invalidate_principal(username=username)
     # Create default flags row
     try:
         from app.crud.user_flags import set_must_change
@@ -20,3 +96,72 @@ def create_user(db, username: str, password: str, role_id: int):
         # Best-effort; do not fail user creation if flag creation fails
         pass
     return user
+
+
+def _set_flags_bulk(db, user_ids: list, must_change: bool):
+    # Update the user_flags rows that exist, insert the missing ones (no commit)
+    existing = set(db.execute(select(UserFlags.user_id).where(UserFlags.user_id.in_(user_ids))).scalars())
+    if existing:
+        db.execute(
+            update(UserFlags).where(UserFlags.user_id.in_(existing)).values(must_change_password=must_change)
+        )
+    missing = [{"user_id": uid, "must_change_password": must_change} for uid in user_ids if uid not in existing]
+    if missing:
+        db.execute(insert(UserFlags), missing)
+
+
+def create_users_bulk(db, users: list, must_change: bool = False) -> dict:
+    """
+    Insert many users (dicts with username, hashed_password, role_id) and their
+    user_flags rows as multi-row INSERTs in one transaction: all or nothing.
+    Returns {username: id}.
+    """
+    if not users:
+        return {}
+    ids = dict(db.execute(insert(User).returning(User.username, User.id), users).all())
+    db.execute(insert(UserFlags), [{"user_id": uid, "must_change_password": must_change} for uid in ids.values()])
+    db.commit()
+    for username in ids:
+        invalidate_principal(username=username)
+    return ids
+
+
+def reset_passwords_bulk(db, hashes: dict, must_change: bool = True):
+    """Set {user_id: new_hash} and the must-change flag for many users in one transaction."""
+    if not hashes:
+        return
+    db.execute(update(User), [{"id": uid, "hashed_password": h} for uid, h in hashes.items()])
+    _set_flags_bulk(db, list(hashes), must_change)
+    db.commit()
+    principal_cache.invalidate_where(lambda p: p.id in hashes)
+
+
+def user_list_select(role_name: str = None, username_prefix: str = None, after: str = None):
+    """
+    SELECT of the columns the admin user listing shows (never the password hash),
+    ordered by username, with role names and must-change flags joined in.
+    `after` is the last username of the previous page (keyset cursor).
+    """
+    stmt = (
+        select(User.id, User.username, Role.role_name, UserFlags.must_change_password)
+        .outerjoin(Role, User.role_id == Role.id)
+        .outerjoin(UserFlags, UserFlags.user_id == User.id)
+    )
+    if role_name is not None:
+        stmt = stmt.where(Role.role_name == role_name)
+    if username_prefix:
+        # The lower bound lets the username index start the scan at the prefix
+        stmt = stmt.where(User.username >= username_prefix,
+                          User.username.startswith(username_prefix, autoescape=True))
+    if after is not None:
+        stmt = stmt.where(User.username > after)
+    return stmt.order_by(User.username)
+
+
+def encode_user_cursor(username: str) -> str:
+    return base64.urlsafe_b64encode(username.encode()).decode().rstrip("=")
+
+
+def decode_user_cursor(cursor: str) -> str:
+    """Inverse of encode_user_cursor; raises ValueError on malformed input."""
+    return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.models.user_flags import UserFlags
+from app.crud.user import invalidate_principal
 
 
 def get_flags(db: Session, user_id: int):
@@ -16,4 +17,5 @@ def set_must_change(db: Session, user_id: int, value: bool):
         db.add(flags)
     db.commit()
     db.refresh(flags)
+    invalidate_principal(user_id=user_id)
     return flags
@@ -1,12 +1,29 @@
+import asyncio
+import logging
 import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+import threading
+from urllib.parse import parse_qsl
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.core import config
+from app.core.metrics import attach_query_tracking
+from app.core.query_diagnostics import attach_query_diagnostics
+from app.core.pool_metrics import (
+    InstrumentedAsyncNullPool,
+    InstrumentedAsyncQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    async_pool_stats,
+    attach_checkout_tracking,
+    sync_pool_stats,
+)
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Database credentials
+# Database credentials (.env is loaded by app.core.config)
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
@@ -14,14 +31,137 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_OPTIONS = os.getenv("DB_OPTIONS", "?sslmode=require")
 
-# Construct the connection string
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}{DB_OPTIONS}"
 
-# The Engine (The connection manager)
-engine = create_engine(DATABASE_URL)
+
+def _url_from_parts() -> str:
+    # Unset parts stay empty instead of becoming "None" (a port of "None" fails to parse)
+    return URL.create(
+        "postgresql",
+        username=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=int(DB_PORT) if DB_PORT else None,
+        database=DB_NAME,
+        query=dict(parse_qsl(DB_OPTIONS.lstrip("?"))),
+    ).render_as_string(hide_password=False)
+
+
+# Construct the connection string (DATABASE_URL overrides the DB_* parts, e.g. for a local database)
+DATABASE_URL = os.getenv("DATABASE_URL") or _url_from_parts()
+# "postgresql", "sqlite", ...: the dialect, read off the scheme without parsing the
+# whole URL, so a missing or malformed setting only fails once an engine is built
+DATABASE_BACKEND = DATABASE_URL.split(":", 1)[0].split("+", 1)[0]
+
+
+def _async_url(url: str):
+    """Map the sync URL onto its async driver: asyncpg for Postgres, aiosqlite for SQLite."""
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend == "postgresql":
+        query = dict(u.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return u.set(drivername="postgresql+asyncpg", query=query)
+    if backend == "sqlite":
+        return u.set(drivername="sqlite+aiosqlite")
+    return u
+
+
+def _pool_options(is_async: bool = False):
+    """Engine pool arguments from DB_POOL_* settings (see app/core/config.py)."""
+    options = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    if config.DB_POOL_MODE == "null":
+        # Transaction pooler in front of the DB: let it do the pooling
+        options["poolclass"] = InstrumentedAsyncNullPool if is_async else InstrumentedNullPool
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+# Engines are built on first use, not at import: importing the app, its models or
+# a script's helpers loads no database driver and opens no connection.
+_engines = {}
+_engine_lock = threading.Lock()
+
+
+def _create_sync_engine():
+    eng = create_engine(DATABASE_URL, **_pool_options())
+    attach_checkout_tracking(eng, sync_pool_stats)
+    attach_query_tracking(eng)
+    attach_query_diagnostics(eng)
+    return eng
+
+
+def _create_async_engine():
+    url = _async_url(DATABASE_URL)
+    connect_args = {}
+    if config.DB_POOL_MODE == "null" and url.get_backend_name() == "postgresql":
+        # Transaction poolers cannot keep asyncpg's per-connection prepared statements
+        connect_args["statement_cache_size"] = 0
+    eng = create_async_engine(url, connect_args=connect_args, **_pool_options(is_async=True))
+    attach_checkout_tracking(eng.sync_engine, async_pool_stats)
+    attach_query_tracking(eng.sync_engine)
+    attach_query_diagnostics(eng.sync_engine)
+    return eng
+
+
+def _get(name: str, factory):
+    eng = _engines.get(name)
+    if eng is None:
+        with _engine_lock:
+            eng = _engines.get(name)
+            if eng is None:
+                eng = _engines[name] = factory()
+    return eng
+
+
+def get_engine():
+    """The sync Engine (scripts, Alembic, the audit writer and maintenance), created on first use."""
+    return _get("sync", _create_sync_engine)
+
+
+def get_async_engine():
+    """The async Engine used by the API routers, created on first use."""
+    return _get("async", _create_async_engine)
+
+
+def __getattr__(name: str):
+    # `from app.database import engine` still works (scripts, tests, Alembic); it builds the engine
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to get_engine() when a session is created."""
+
+    def __call__(self, **local_kw):
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+
+class _LazyAsyncSessionmaker(async_sessionmaker):
+    """async_sessionmaker that binds to get_async_engine() when a session is created."""
+
+    def __call__(self, **local_kw):
+        local_kw.setdefault("bind", get_async_engine())
+        return super().__call__(**local_kw)
+
 
 # The Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+# The async Session factory; objects stay usable after commit (no implicit lazy refresh)
+AsyncSessionLocal = _LazyAsyncSessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # The Base class for models
 Base = declarative_base()
@@ -36,4 +176,75 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Async counterpart of get_db for `async def` routes: DB waits no longer hold
+    a threadpool thread. Sync CRUD helpers can be reused via `db.run_sync(fn, ...)`.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _engine_pool_status(eng, stats):
+    pool = eng.pool
+    status = {"pool_class": type(pool).__name__}
+    if hasattr(pool, "checkedin"):
+        status.update(
+            size=pool.size(),
+            max_overflow=config.DB_MAX_OVERFLOW,
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    status.update(stats.snapshot())
+    return status
+
+
+def get_pool_status():
+    """Pool configuration, live occupancy and cumulative checkout statistics."""
+    return {
+        "mode": config.DB_POOL_MODE,
+        "sync": _engine_pool_status(get_engine(), sync_pool_stats),
+        "async": _engine_pool_status(get_async_engine().sync_engine, async_pool_stats),
+    }
+
+
+async def warm_pools(connections: int):
+    """
+    Open `connections` pooled connections on each engine (at most DB_POOL_SIZE;
+    one with DB_POOL_MODE=null, which only initializes the dialect) and return
+    them to the pool, so the first requests after startup don't pay for connecting.
+    Failures are logged, not raised: a worker may start before its database.
+    """
+    n = 1 if config.DB_POOL_MODE == "null" else min(connections, config.DB_POOL_SIZE)
+
+    async def _async_connect_all():
+        # All held at once, so the pool opens n distinct connections
+        eng = get_async_engine()
+        conns = await asyncio.gather(*(eng.connect().start() for _ in range(n)), return_exceptions=True)
+        try:
+            for conn in conns:
+                if isinstance(conn, BaseException):
+                    raise conn
+                await conn.execute(text("SELECT 1"))
+        finally:
+            for conn in conns:
+                if not isinstance(conn, BaseException):
+                    await conn.close()
+
+    def _sync_connect_all():
+        conns = []
+        try:
+            for _ in range(n):
+                conns.append(get_engine().connect())
+                conns[-1].execute(text("SELECT 1"))
+        finally:
+            for conn in conns:
+                conn.close()
+
+    try:
+        await asyncio.gather(asyncio.to_thread(_sync_connect_all), _async_connect_all())
+    except Exception as exc:
+        logger.warning("Connection pool warm-up failed: %s", exc)
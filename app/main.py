@@ -1,19 +1,63 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from app.database import DATABASE_BACKEND, get_async_engine, get_pool_status, warm_pools
 from app.api import auth, patients, admin  # Ensure admin is imported here
+from app.core import config
+from app.core.security import KDFBusyError, warm_kdf_pool
+from app.core.startup import startup
+from app.core import metrics
+from app.core.maintenance import maintenance
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_diagnostics import QueryDiagnosticsMiddleware
+from app.crud.audit import audit_writer
+from app.crud.password_reset import purge_expired
+
+# 1. The database schema is managed by Alembic (`alembic upgrade head`); importing
+# the app neither connects to the database nor creates tables.
+
+# Housekeeping jobs, run by one leader among all workers
+maintenance.add_job(
+    "purge_reset_tokens",
+    lambda db: purge_expired(db, batch_size=config.RESET_TOKEN_PURGE_BATCH_SIZE),
+    config.RESET_TOKEN_PURGE_INTERVAL_SECONDS,
+)
+if DATABASE_BACKEND == "postgresql":
+    from app.crud.audit_partitions import ensure_partitions_job
+    maintenance.add_job("ensure_audit_partitions", ensure_partitions_job, config.AUDIT_PARTITION_CHECK_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up: pay the first-request costs before the worker is marked ready
+    with startup.phase("orm_mappers"):
+        configure_mappers()
+    if config.STARTUP_WARM_CONNECTIONS > 0:
+        with startup.phase("db_pools"):
+            await warm_pools(config.STARTUP_WARM_CONNECTIONS)
+    if config.STARTUP_WARM_KDF:
+        with startup.phase("kdf_pool"):
+            await warm_kdf_pool()
+    # Background audit writer (Integrity without a commit per event)
+    if config.AUDIT_ASYNC:
+        audit_writer.start()
+    if config.MAINTENANCE_ENABLED:
+        maintenance.start()
+    startup.ready()
+    yield
+    maintenance.stop()
+    # Flush queued audit events before the worker exits
+    audit_writer.stop()
 
-# 1. Initialize the Database (Integrity Pillar)
-# In test environments or when SKIP_DB_CREATE is set, skip creating tables to avoid contacting external DBs.
-import os
-if os.getenv("SKIP_DB_CREATE", "false").lower() != "true":
-    # This creates all tables in Supabase (Users, Patients, Audit Logs) automatically.
-    Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Secure Hospital Information System",
     description="A CIA-Triad based HIS focusing on Confidentiality, Integrity, and Availability",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # 2. Configure CORS (Confidentiality Pillar)
@@ -26,18 +70,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, status codes and DB/KDF time per request, published on /metrics
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Opt-in N+1 / slow-statement / query-budget reporting per request
+if config.QUERY_DIAGNOSTICS != "off":
+    app.add_middleware(QueryDiagnosticsMiddleware)
+
 # 3. Include API Routes (Role-Based Access Control)
 # Each router handles a different part of the CIA Triad.
 app.include_router(auth.router)      # Authentication (Confidentiality)
 app.include_router(patients.router)  # Medical Records (Availability/Confidentiality)
 app.include_router(admin.router)     # System Logs & Management (Integrity)
 
+# Password hashing pool saturated: tell clients to back off rather than queue forever
+@app.exception_handler(KDFBusyError)
+async def kdf_busy_handler(request: Request, exc: KDFBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @app.get("/")
-def root():
+async def root():
     """System Health Check"""
+    try:
+        async with get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        database = "Active"
+    except Exception:
+        database = "Unavailable"
     return {
         "message": "Secure HIS API is running",
         "status": "Online",
         "security_framework": "CIA Triad",
-        "database_connection": "Supabase Active"
-    }
\ No newline at end of file
+        "database_connection": database,
+        "database_backend": DATABASE_BACKEND,
+    }
+
+
+def _pool_metrics():
+    checked_out = metrics.Gauge("db_pool_checked_out", "Connections currently checked out.", ("engine",))
+    checkouts = metrics.Counter("db_pool_checkouts_total", "Connection checkouts.", ("engine",))
+    timeouts = metrics.Counter("db_pool_timeouts_total", "Checkouts that timed out waiting.", ("engine",))
+    for name, status in get_pool_status().items():
+        if isinstance(status, dict):
+            checked_out.set((name,), status["checked_out"])
+            checkouts.inc((name,), status["checkouts"])
+            timeouts.inc((name,), status["timeouts"])
+    return checked_out, checkouts, timeouts
+
+
+if config.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """
+        Prometheus scrape endpoint; expose it to the internal network only.
+        Async on purpose: rendering must run on the event loop, the only thread
+        that updates the request metrics (see app/core/metrics.py).
+        """
+        return PlainTextResponse(
+            metrics.render(_pool_metrics() + (startup.gauge(),)), media_type="text/plain; version=0.0.4"
+        )
+
+
+startup.imported()
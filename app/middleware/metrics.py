@@ -0,0 +1,43 @@
+import time
+
+from app.core import metrics
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: per-route latency, status codes, in-flight requests and
+    the DB/KDF time each request accumulated (see app/core/metrics.py). Routes are
+    labelled by their path template ("/patients/{patient_id}"), so label
+    cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.http_in_flight.inc(amount=-1)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"], getattr(route, "path", "<unmatched>"), status, elapsed, stats
+            )
+            metrics.current_request.reset(token)
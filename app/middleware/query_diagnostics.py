@@ -0,0 +1,24 @@
+from app.core import config
+from app.core.query_diagnostics import budgets, capture_queries
+
+
+class QueryDiagnosticsMiddleware:
+    """
+    Runs every HTTP request inside capture_queries() and reports it under
+    "METHOD /route/template" with that route's budget (QUERY_DIAGNOSTICS=log|strict).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        strict = config.QUERY_DIAGNOSTICS == "strict"
+        with capture_queries(f"{scope['method']} {scope['path']}", strict=strict) as log:
+            await self.app(scope, receive, send)
+            route = scope.get("route")
+            if route is not None:
+                log.label = f"{scope['method']} {route.path}"
+                log.budget = budgets.get(log.label)
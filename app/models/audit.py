@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from datetime import datetime
 from app.database import Base
 
@@ -10,4 +10,15 @@ class AuditLog(Base):
     action = Column(String)                           # What did they do? (e.g., LOGIN, VIEW, UPDATE)
     resource_id = Column(String, nullable=True)       # Which patient record was affected?
     ip_address = Column(String, nullable=True)        # Where did they do it from?
-    timestamp = Column(DateTime, default=datetime.utcnow) # When did it happen?
\ No newline at end of file
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False) # When did it happen? (partition key on Postgres)
+
+    # Keyset pagination on (timestamp, id) plus the filters of /admin/audit-logs
+    # (see alembic/versions/0002_audit_log_indexes.py). On Postgres the table is
+    # range-partitioned by month on timestamp (0003_partition_audit_logs.py).
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_audit_logs_user_id_timestamp", "user_id", "timestamp", "id"),
+        Index("ix_audit_logs_resource_id_timestamp", "resource_id", "timestamp", "id"),
+        Index("ix_audit_logs_ip_address_timestamp", "ip_address", "timestamp", "id"),
+        Index("ix_audit_logs_action_prefix", "action", postgresql_ops={"action": "varchar_pattern_ops"}),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, text
+from datetime import datetime
+from app.database import Base
+
+class BreakGlassGrant(Base):
+    """Short-lived emergency access to one patient for one user."""
+    __tablename__ = "break_glass_grants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    reason = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    # Cleared when an expired grant is replaced; at most one active grant per user + patient
+    active = Column(Boolean, default=True, server_default=text("true"), nullable=False)
+
+    # Active-grant lookup: user + patient, newest expiry first. The partial unique
+    # index (alembic 0009) makes concurrent first requests open a single grant.
+    __table_args__ = (
+        Index("ix_break_glass_grants_user_patient_expires", "user_id", "patient_id", "expires_at"),
+        Index(
+            "uq_break_glass_grants_active", "user_id", "patient_id", unique=True,
+            postgresql_where=text("active"), sqlite_where=text("active"),
+        ),
+    )
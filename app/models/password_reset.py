@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from datetime import datetime
 from app.database import Base
 
@@ -11,3 +11,16 @@ class PasswordResetToken(Base):
     expires_at = Column(DateTime, nullable=False)
     used_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Lookup by hash uses the unique token_hash index; partial indexes (alembic 0006)
+    # cover what the purge scans: unused tokens by expiry, and used ones
+    __table_args__ = (
+        Index(
+            "ix_password_reset_tokens_unused_expires", "expires_at",
+            postgresql_where=text("used_at IS NULL"), sqlite_where=text("used_at IS NULL"),
+        ),
+        Index(
+            "ix_password_reset_tokens_used_at", "used_at",
+            postgresql_where=text("used_at IS NOT NULL"), sqlite_where=text("used_at IS NOT NULL"),
+        ),
+    )
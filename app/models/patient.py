@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func
 from datetime import datetime
 from app.database import Base
 
@@ -7,4 +7,13 @@ class Patient(Base):
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String, nullable=False)
     medical_history = Column(Text) # Sensitive content [cite: 4]
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Ordered keyset scans for name search: (full_name, id) for fuzzy matches, and
+    # (lower(full_name), id) for prefix matches, which Postgres builds with COLLATE "C"
+    # (alembic/versions/0008). Postgres also has a pg_trgm GIN index for fuzzy matching
+    # (alembic/versions/0004_patient_name_search.py)
+    __table_args__ = (
+        Index("ix_patients_full_name_id", "full_name", "id"),
+        Index("ix_patients_lower_full_name_id", func.lower(full_name), "id"),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class PatientImport(Base):
+    """Checkpoint of a resumable patient import, committed together with each chunk."""
+    __tablename__ = "patient_imports"
+
+    job_id = Column(String, primary_key=True)
+    source = Column(String, nullable=True)
+    records = Column(Integer, nullable=False, default=0)  # source records consumed so far
+    imported = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default="running")  # running | done
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
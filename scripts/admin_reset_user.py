@@ -1,28 +1,93 @@
 #!/usr/bin/env python3
 """
-One-off script to reset a user's password from the command line.
+Reset user passwords from the command line.
 Usage: python scripts/admin_reset_user.py <username> <temporary_password>
+       python scripts/admin_reset_user.py --bulk resets.csv
+The bulk CSV has the columns username,temporary_password; every password is hashed
+in parallel and all users are updated in one transaction. Users must change their
+password on next login.
 Note: This script must be run from within the project virtualenv and with DB access.
 """
+import argparse
+import csv
+import os
 import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
 from app.database import SessionLocal
 from app.models.user import User
-from app.core.security import hash_password
-
-if len(sys.argv) != 3:
-    print('Usage: admin_reset_user.py <username> <temporary_password>')
-    sys.exit(2)
-
-username = sys.argv[1]
-temp_pw = sys.argv[2]
-
-s = SessionLocal()
-user = s.query(User).filter(User.username == username).first()
-if not user:
-    print('User not found')
-    sys.exit(1)
-user.hashed_password = hash_password(temp_pw)
-user.must_change_password = True
-s.add(user)
-s.commit()
-print(f"Password reset for {username}. User must change password on next login.")
+from app.core.security import hash_passwords
+from app.crud.audit import log_events
+from app.crud.user import reset_passwords_bulk
+
+MIN_PASSWORD_LENGTH = 8  # same rule as POST /admin/reset-password
+
+
+def read_resets(path: str) -> list:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        return [(row["username"].strip(), row["temporary_password"]) for row in csv.DictReader(fh)]
+
+
+def reset_users(db, resets: list) -> list:
+    """Apply [(username, temporary_password)]; returns the usernames that were not reset, with why."""
+    errors = []
+    valid = []
+    for username, password in resets:
+        if len(password or "") < MIN_PASSWORD_LENGTH:
+            errors.append((username, f"temporary password shorter than {MIN_PASSWORD_LENGTH} characters"))
+        else:
+            valid.append((username, password))
+
+    # Case-insensitive match, like the admin API
+    found = {
+        name.lower(): (uid, name)
+        for uid, name in db.execute(
+            select(User.id, User.username).where(func.lower(User.username).in_({u.lower() for u, _ in valid}))
+        ).all()
+    }
+    targets = []
+    for username, password in valid:
+        if username.lower() in found:
+            targets.append((found[username.lower()], password))
+        else:
+            errors.append((username, "user not found"))
+
+    hashes = hash_passwords([password for _, password in targets])
+    reset_passwords_bulk(db, {uid: hashed for ((uid, _), _), hashed in zip(targets, hashes)})
+    log_events(db, [{"user_id": None, "action": f"PASSWORD_ADMIN_RESET: {name}"} for (_, name), _ in targets])
+    for (_, name), _ in targets:
+        print(f"Password reset for {name}.")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("username", nargs="?")
+    parser.add_argument("temporary_password", nargs="?")
+    parser.add_argument("--bulk", metavar="CSV", help="reset every username,temporary_password row in CSV")
+    args = parser.parse_args()
+
+    if args.bulk:
+        resets = read_resets(args.bulk)
+    elif args.username and args.temporary_password:
+        resets = [(args.username, args.temporary_password)]
+    else:
+        parser.print_usage()
+        sys.exit(2)
+
+    db = SessionLocal()
+    try:
+        errors = reset_users(db, resets)
+    finally:
+        db.close()
+    for username, reason in errors:
+        print(f"Not reset: {username} ({reason})", file=sys.stderr)
+    print(f"{len(resets) - len(errors)} reset, {len(errors)} failed. Users must change password on next login.")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
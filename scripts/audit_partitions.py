@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance for the monthly-partitioned audit_logs table (Postgres).
+
+  python scripts/audit_partitions.py ensure [--months-ahead 3]
+      Create upcoming monthly partitions (safe to run repeatedly, e.g. daily from cron).
+  python scripts/audit_partitions.py list
+      Show the monthly partitions and their ranges.
+  python scripts/audit_partitions.py archive --keep-months 24 --out-dir archive/audit [--dry-run]
+      Detach every partition older than the retention window, write it to
+      <out-dir>/<partition>.csv.gz and drop it (no DELETE, no table bloat).
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import engine
+from app.crud.audit_partitions import archive_older_than, ensure_partitions, list_partitions
+
+
+def _months_before(d: date, months: int) -> date:
+    idx = d.year * 12 + (d.month - 1) - months
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_ensure = sub.add_parser('ensure')
+    p_ensure.add_argument('--months-ahead', type=int, default=3)
+    sub.add_parser('list')
+    p_archive = sub.add_parser('archive')
+    p_archive.add_argument('--keep-months', type=int, required=True, help='full months to keep besides the current one')
+    p_archive.add_argument('--out-dir', required=True)
+    p_archive.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'ensure':
+        with engine.begin() as conn:
+            created = ensure_partitions(conn, args.months_ahead)
+        print(f"Created {created} partition(s).")
+    elif args.command == 'list':
+        with engine.connect() as conn:
+            for name, lower, upper in list_partitions(conn):
+                print(f"{name}\t[{lower}, {upper})")
+    else:
+        cutoff = _months_before(date.today().replace(day=1), args.keep_months)
+        results = archive_older_than(engine, cutoff, args.out_dir, dry_run=args.dry_run)
+        if not results:
+            print(f"No partitions end before {cutoff}.")
+        for name, path, count in results:
+            if args.dry_run:
+                print(f"would archive {name}")
+            else:
+                print(f"archived {name}: {count} rows -> {path}")
+
+
+if __name__ == '__main__':
+    main()
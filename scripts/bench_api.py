@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+End-to-end API benchmark: latency percentiles and throughput per scenario and
+concurrency level, with JSON output that can be compared against a baseline.
+
+  python scripts/bench_api.py                                  # all scenarios, in-process
+  python scripts/bench_api.py --scenarios login,get_patient --concurrency 1,8,32 --requests 500
+  python scripts/bench_api.py --out results.json --baseline baseline.json --tolerance 0.2
+  python scripts/bench_api.py --url http://localhost:8000      # a running server
+
+Scenarios: login, protected (GET /admin/roles through get_current_user),
+get_patient, break_glass, audit_list, register. By default requests go through
+the ASGI app in-process (no network, app lifespan included); --url targets a
+live server, which must share DATABASE_URL with this script and run with
+LOGIN_RATE_LIMIT_ENABLED=false. Setup creates a bench admin and, if the table
+is nearly empty, 1000 patients in the local database; register adds
+bench_<run>_<n> users. For production-like volumes load scripts/generate_data.py first.
+
+Requests/s counts successful (< 400) responses only. With --baseline, any
+scenario/concurrency whose p95 rose, whose requests/s fell or whose error rate
+rose by more than --tolerance is reported and the exit status is 1; errors
+where the baseline had none always count as a regression.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Every login comes from one client: keep the throttle out of the measurement
+os.environ.setdefault('LOGIN_RATE_LIMIT_ENABLED', 'false')
+
+import httpx
+
+from app.database import SessionLocal, engine
+
+SCENARIOS = ("login", "protected", "get_patient", "break_glass", "audit_list", "register")
+BENCH_ADMIN = "bench_admin"
+BENCH_PASSWORD = "bench-password-123"
+MIN_PATIENTS = 1000
+
+
+def setup() -> list:
+    """Ensure the bench admin and some patients exist; return patient ids to read."""
+    from sqlalchemy import func, insert, select
+    from app.crud.user import create_user
+    from app.models.patient import Patient
+    from app.models.user import Role, User
+
+    db = SessionLocal()
+    try:
+        role = db.query(Role).filter(Role.role_name == "Admin").first()
+        if role is None:
+            role = Role(role_name="Admin")
+            db.add(role)
+            db.commit()
+        if db.query(User).filter(User.username == BENCH_ADMIN).first() is None:
+            create_user(db, BENCH_ADMIN, BENCH_PASSWORD, role.id)
+        if db.execute(select(func.count(Patient.id))).scalar() < MIN_PATIENTS:
+            db.execute(insert(Patient), [
+                {"full_name": f"Bench Patient {i}", "medical_history": "Synthetic record for benchmarking."}
+                for i in range(MIN_PATIENTS)
+            ])
+            db.commit()
+        return list(db.execute(select(Patient.id).order_by(Patient.id).limit(MIN_PATIENTS)).scalars())
+    finally:
+        db.close()
+
+
+def make_requests(name: str, token: str, patient_ids: list, run_id: str):
+    """Return request(i) -> (method, path, kwargs) for scenario `name`."""
+    auth = {"headers": {"Authorization": f"Bearer {token}"}}
+    pick = lambda i: patient_ids[(i * 7919) % len(patient_ids)]  # spread reads over the id set
+    if name == "login":
+        return lambda i: ("POST", "/auth/login", {"json": {"username": BENCH_ADMIN, "password": BENCH_PASSWORD}})
+    if name == "protected":
+        return lambda i: ("GET", "/admin/roles", auth)
+    if name == "get_patient":
+        return lambda i: ("GET", f"/patients/{pick(i)}", {})
+    if name == "break_glass":
+        return lambda i: ("POST", f"/patients/{pick(i)}/break-glass", {"params": {"reason": "benchmark"}})
+    if name == "audit_list":
+        return lambda i: ("GET", "/admin/audit-logs", {"params": {"limit": 100}, **auth})
+    if name == "register":
+        serial = itertools.count()  # unique across warm-up and every level
+        return lambda i: ("POST", "/admin/register-user", {
+            "json": {"username": f"bench_{run_id}_{next(serial)}", "password": BENCH_PASSWORD, "role_name": "Admin"},
+            **auth,
+        })
+    raise ValueError(f"Unknown scenario {name!r}")
+
+
+async def run_level(client: httpx.AsyncClient, request_for, concurrency: int, total: int) -> dict:
+    """Send `total` requests from `concurrency` concurrent workers; summarize latencies."""
+    latencies = []
+    statuses = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            method, path, kwargs = request_for(i)
+            start = time.perf_counter()
+            r = await client.request(method, path, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    q = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    errors = sum(n for code, n in statuses.items() if code >= 400)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "rps": round((len(latencies) - errors) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(q[49], 3),
+        "p95_ms": round(q[94], 3),
+        "p99_ms": round(q[98], 3),
+    }
+
+
+async def run(args) -> dict:
+    patient_ids = setup()
+    run_id = uuid.uuid4().hex[:8]
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        lifespan = None
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+    results = {}
+    try:
+        login = await client.post("/auth/login", json={"username": BENCH_ADMIN, "password": BENCH_PASSWORD})
+        login.raise_for_status()
+        token = login.json()["access_token"]
+        for name in args.scenarios:
+            request_for = make_requests(name, token, patient_ids, run_id)
+            results[name] = {}
+            for i in range(min(args.warmup, args.requests)):  # warm caches and the pool
+                method, path, kwargs = request_for(-1 - i)
+                await client.request(method, path, **kwargs)
+            for level in args.concurrency:
+                total = max(args.requests, level)
+                summary = await run_level(client, request_for, level, total)
+                results[name][str(level)] = summary
+                print(f"{name:<12} c={level:<4} {summary['rps']:>9.1f} req/s  p50 {summary['p50_ms']:>8.2f}  "
+                      f"p95 {summary['p95_ms']:>8.2f}  p99 {summary['p99_ms']:>8.2f} ms  errors {summary['errors']} ({summary['error_rate']:.1%})")
+    finally:
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _error_rate(summary: dict) -> float:
+    # Baselines written before error_rate was recorded only have the counts
+    return summary.get("error_rate", summary["errors"] / summary["requests"] if summary["requests"] else 0.0)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions as readable strings: p95 up, requests/s down or error rate up by more than `tolerance`."""
+    regressions = []
+    for name, levels in results.items():
+        for level, now in levels.items():
+            before = baseline.get("results", {}).get(name, {}).get(level)
+            if not before:
+                continue
+            if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} c={level}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+            if now["rps"] < before["rps"] * (1 - tolerance):
+                regressions.append(f"{name} c={level}: {before['rps']:.1f} -> {now['rps']:.1f} req/s")
+            rate, before_rate = _error_rate(now), _error_rate(before)
+            if rate > before_rate * (1 + tolerance):
+                regressions.append(f"{name} c={level}: error rate {before_rate:.1%} -> {rate:.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--baseline", help="earlier --out file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95/throughput change")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": engine.dialect.name,
+            "target": args.url or "in-process",
+            "requests_per_level": args.requests,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Measure bcrypt on this host and recommend the highest work factor whose median
+hash time stays under a target latency.
+Usage: python scripts/calibrate_bcrypt.py [--target-ms 100] [--samples 5]
+Set the result as BCRYPT_ROUNDS; existing hashes migrate on each user's next login.
+"""
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+MIN_ROUNDS = 10  # below this bcrypt offers too little protection to recommend
+MAX_ROUNDS = 18
+
+
+def time_rounds(rounds: int, samples: int) -> float:
+    """Median milliseconds for one hashpw at `rounds`."""
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-ms', type=float, default=100.0)
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    chosen = None
+    print(f"{'rounds':>6} {'median ms':>10}")
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        ms = time_rounds(rounds, args.samples)
+        print(f"{rounds:>6} {ms:>10.1f}")
+        if ms > args.target_ms:
+            break
+        chosen = rounds
+
+    if chosen is None:
+        print(f"\nEven {MIN_ROUNDS} rounds exceed {args.target_ms:.0f} ms on this host; use BCRYPT_ROUNDS={MIN_ROUNDS} "
+              f"and size KDF_WORKERS / KDF_MAX_PENDING for it.")
+    else:
+        print(f"\nRecommended: BCRYPT_ROUNDS={chosen}")
+
+
+if __name__ == '__main__':
+    main()
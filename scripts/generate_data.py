@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Fill the database with deterministic synthetic data at production-like volume.
+
+  python scripts/generate_data.py --staff 50000 --patients 5000000 --audit 200000000 --workers 8
+  python scripts/generate_data.py --seed 7 --staff 500 --patients 50000 --audit 1000000 --days 90
+
+Generates roles, users (+ user_flags), patients, password_reset_tokens and
+audit_logs. The same --seed and volumes always give the same rows, whatever
+--workers is: every block of --block-size rows has its own RNG derived from
+(seed, table, block) and explicit ids. Blocks load in parallel processes, each
+as one transaction through COPY (Postgres) or multi-row executemany (SQLite,
+which is single-writer, so it always runs with one worker).
+
+Distributions: surnames and patient access are heavy-tailed (a few very active
+staff, "hot" patients), activity follows a day-shift curve, most reset tokens are
+expired or used, and PATIENT_VIEW dominates the audit mix. New rows are appended
+after the current max ids. Every synthetic user's password is --password.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+from multiprocessing import Pool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.pool import NullPool
+
+from app.core.pgcopy import copy_from
+from app.core.security import hash_password
+from app.database import DATABASE_URL, engine
+from app.models.audit import AuditLog
+from app.models.password_reset import PasswordResetToken
+from app.models.patient import Patient
+from app.models.user import Role, User
+from app.models.user_flags import UserFlags
+
+ROLE_WEIGHTS = {"Nurse": 45, "Doctor": 25, "Receptionist": 12, "LabTech": 8, "Pharmacist": 7, "Admin": 3}
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Amina", "Wanjiru", "Kwame", "Aisha", "Chen", "Mei", "Raj", "Priya", "Omar", "Fatima", "Ivan", "Olga",
+    "Carlos", "Lucia", "Kenji", "Yuki", "Grace", "Peter", "Esther", "Daniel", "Ruth", "Samuel", "Naomi",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Otieno", "Kamau", "Mensah", "Okafor", "Wang", "Li", "Zhang", "Patel", "Singh", "Khan", "Ivanov",
+    "Nakamura", "Tanaka", "Baker", "Mwangi", "Achieng", "Njoroge", "Hassan", "Cohen", "Silva", "Costa",
+]
+# Zipf-like weights: the first surnames are far more common than the last
+LAST_NAME_WEIGHTS = [1 / (rank + 1) for rank in range(len(LAST_NAMES))]
+CONDITIONS = [
+    "Hypertension", "Type 2 Diabetes", "Asthma", "COPD", "Chronic kidney disease", "Atrial fibrillation",
+    "Hypothyroidism", "Osteoarthritis", "Major depressive disorder", "Migraine", "HIV, on ART", "Sickle cell disease",
+]
+ALLERGIES = ["No known allergies.", "Allergic to Penicillin.", "Allergic to Sulfa drugs.", "Latex allergy."]
+# (action template, weight), spelled as the app writes them; {u} = the acting username
+# (logged without a user id), {reason} = a break-glass reason. Patient actions get a resource_id.
+AUDIT_ACTIONS = [
+    ("PATIENT_VIEW", 70), ("LOGIN_SUCCESS", 15), ("LOGIN_FAILED: {u}", 5),
+    ("PASSWORD_RESET_REQUESTED", 1.5), ("PASSWORD_RESET_COMPLETED", 1), ("PASSWORD_ADMIN_RESET: {u}", 0.5),
+    ("BREAK-GLASS: {reason}", 0.3), ("BREAK-GLASS-ACCESS (grant {grant}): {reason}", 0.2),
+    ("LOGIN_THROTTLED: {u}", 0.5), ("AUDIT_EXPORT: {u}", 0.01), ("PATIENT_IMPORT: {u}", 0.01),
+]
+PATIENT_ACTIONS = {"PATIENT_VIEW", "BREAK-GLASS: {reason}", "BREAK-GLASS-ACCESS (grant {grant}): {reason}"}
+BREAK_GLASS_REASONS = ["cardiac arrest", "unconscious patient", "trauma bay", "ICU transfer", "code blue"]
+# Relative activity per hour of day (day shift peak, quiet nights)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 10, 10, 10, 9, 8, 9, 10, 10, 9, 7, 5, 4, 3, 2, 2, 1]
+TABLE_SALT = {"users": 1, "patients": 2, "password_reset_tokens": 3, "audit_logs": 4}
+LAST_NAME_CUM = list(accumulate(LAST_NAME_WEIGHTS))
+
+_worker_engine = None
+
+
+def _rng(seed: int, table: str, block: int) -> random.Random:
+    return random.Random(seed * 1_000_003 + TABLE_SALT[table] * 100_003 + block)
+
+
+def _username(seed: int, user_id: int) -> str:
+    """Pure function of (seed, id), so audit rows can name users without a lookup."""
+    h = (user_id * 2654435761 + seed * 40503) % 2**32
+    first = FIRST_NAMES[h % len(FIRST_NAMES)]
+    last = LAST_NAMES[bisect(LAST_NAME_CUM, (h >> 8) / 2**24 * LAST_NAME_CUM[-1])]
+    return f"{first}.{last}.{user_id}".lower()
+
+
+def _skewed(rng: random.Random, n: int) -> int:
+    """Index in [0, n), power-law skewed: the first 1% get about 16% of picks, the first 10% about 40%."""
+    return int(n * rng.random() ** 2.5)
+
+
+def _times(rng: random.Random, count: int, end: datetime, days: int) -> list:
+    """`count` timestamps over the `days` before `end`, following the shift curve."""
+    hours = rng.choices(range(24), HOUR_WEIGHTS, k=count)
+    return [
+        end - timedelta(days=rng.randrange(days) + 1) + timedelta(hours=h, seconds=rng.random() * 3600)
+        for h in hours
+    ]
+
+
+# --- Row generators: (seed, block, first id, count, ctx) -> {table: [row dict]} ---
+
+def gen_users(seed, block, first_id, count, ctx):
+    rng = _rng(seed, "users", block)
+    roles = rng.choices([ctx["role_ids"][r] for r in ROLE_WEIGHTS], list(ROLE_WEIGHTS.values()), k=count)
+    users, flags = [], []
+    for user_id, role_id in zip(range(first_id, first_id + count), roles):
+        users.append({"id": user_id, "username": _username(seed, user_id),
+                      "hashed_password": ctx["password_hash"], "role_id": role_id})
+        flags.append({"id": user_id + ctx["flag_offset"], "user_id": user_id,
+                      "must_change_password": rng.random() < 0.03})
+    return {"users": users, "user_flags": flags}
+
+
+def gen_patients(seed, block, first_id, count, ctx):
+    rng = _rng(seed, "patients", block)
+    last_names = rng.choices(LAST_NAMES, cum_weights=LAST_NAME_CUM, k=count)
+    updated = _times(rng, count, ctx["end"], ctx["days"] * 5)
+    rows = []
+    for i, patient_id in enumerate(range(first_id, first_id + count)):
+        history = ", ".join(rng.sample(CONDITIONS, rng.choice((0, 1, 1, 2, 2, 3)))) or "No chronic conditions"
+        rows.append({"id": patient_id, "full_name": f"{rng.choice(FIRST_NAMES)} {last_names[i]}",
+                     "medical_history": f"{history}. {rng.choice(ALLERGIES)}", "updated_at": updated[i]})
+    return {"patients": rows}
+
+
+def gen_tokens(seed, block, first_id, count, ctx):
+    rng = _rng(seed, "password_reset_tokens", block)
+    first_user, n_users = ctx["user_ids"]
+    created = _times(rng, count, ctx["end"], ctx["days"])
+    rows = []
+    for i, token_id in enumerate(range(first_id, first_id + count)):
+        used = created[i] + timedelta(minutes=rng.randrange(1, 60)) if rng.random() < 0.6 else None
+        rows.append({"id": token_id, "user_id": first_user + rng.randrange(n_users),
+                     "token_hash": f"{rng.getrandbits(256):064x}", "expires_at": created[i] + timedelta(hours=1),
+                     "used_at": used, "created_at": created[i]})
+    return {"password_reset_tokens": rows}
+
+
+def gen_audit(seed, block, first_id, count, ctx):
+    rng = _rng(seed, "audit_logs", block)
+    first_user, n_users = ctx["user_ids"]
+    first_patient, n_patients = ctx["patient_ids"]
+    actions, weights = zip(*AUDIT_ACTIONS)
+    picked = rng.choices(actions, weights, k=count)
+    times = _times(rng, count, ctx["end"], ctx["days"])
+    rows = []
+    for i, log_id in enumerate(range(first_id, first_id + count)):
+        user_id = first_user + _skewed(rng, n_users)
+        action = picked[i]
+        resource_id = None
+        if action in PATIENT_ACTIONS and n_patients:
+            resource_id = str(first_patient + _skewed(rng, n_patients))
+        if "{reason}" in action:
+            action = action.format(reason=rng.choice(BREAK_GLASS_REASONS), grant=1 + rng.randrange(count))
+        if "{u}" in action:
+            # Failures and operator actions are logged without a user id, name in the action
+            action, user_id = action.format(u=_username(seed, user_id)), None
+        rows.append({"id": log_id, "user_id": user_id, "action": action, "resource_id": resource_id,
+                     "ip_address": f"10.{rng.randrange(4)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                     "timestamp": times[i]})
+    return {"audit_logs": rows}
+
+
+TABLES = {
+    "users": User.__table__, "user_flags": UserFlags.__table__, "patients": Patient.__table__,
+    "password_reset_tokens": PasswordResetToken.__table__, "audit_logs": AuditLog.__table__,
+}
+
+
+def _write(conn, table_name: str, rows: list):
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        columns = list(rows[0])
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in rows:
+            writer.writerow([r[c] for c in columns])  # None -> unquoted empty -> NULL
+        buf.seek(0)
+        cols = ", ".join(f'"{c}"' for c in columns)
+        copy_from(conn.connection.dbapi_connection, f"COPY {table_name} ({cols}) FROM STDIN WITH (FORMAT csv)", buf)
+    else:
+        conn.execute(TABLES[table_name].insert(), rows)
+
+
+def _init_worker():
+    global _worker_engine
+    # One fresh connection per process; never reuse the parent's pooled sockets
+    _worker_engine = create_engine(DATABASE_URL, poolclass=NullPool)
+
+
+def _run_block(task):
+    gen, seed, block, first_id, count, ctx = task
+    data = gen(seed, block, first_id, count, ctx)
+    with _worker_engine.begin() as conn:
+        for table_name, rows in data.items():
+            _write(conn, table_name, rows)
+    return count
+
+
+def _max_id(conn, model) -> int:
+    return conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+
+
+def _ensure_roles(conn) -> dict:
+    existing = dict(conn.execute(select(Role.role_name, Role.id)).all())
+    for name in ROLE_WEIGHTS:
+        if name not in existing:
+            existing[name] = conn.execute(Role.__table__.insert().values(role_name=name).returning(Role.id)).scalar()
+    return existing
+
+
+def _load(pool, label: str, gen, seed: int, first_id: int, total: int, block_size: int, ctx: dict):
+    if total <= 0:
+        return
+    tasks = [
+        (gen, seed, block, first_id + block * block_size, min(block_size, total - block * block_size), ctx)
+        for block in range((total + block_size - 1) // block_size)
+    ]
+    started = time.perf_counter()
+    done = 0
+    for count in pool.imap_unordered(_run_block, tasks):
+        done += count
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        print(f"\r{label}: {done:,}/{total:,} ({rate:,.0f} rows/s)", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--staff", type=int, default=500)
+    parser.add_argument("--patients", type=int, default=50_000)
+    parser.add_argument("--tokens", type=int, default=5_000)
+    parser.add_argument("--audit", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365, help="history covered by audit rows and tokens")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--block-size", type=int, default=50_000)
+    parser.add_argument("--password", default="Synthetic-Passw0rd", help="password of every generated user")
+    args = parser.parse_args()
+    if args.staff <= 0 and (args.tokens or args.audit):
+        parser.error("--tokens and --audit need --staff > 0")
+
+    is_pg = engine.dialect.name == "postgresql"
+    workers = args.workers if is_pg else 1
+    # Fixed end date keeps a given seed reproducible from day to day
+    end = datetime(2026, 1, 1) + timedelta(days=args.seed % 365)
+    with engine.begin() as conn:
+        role_ids = _ensure_roles(conn)
+        first = {m: _max_id(conn, m) + 1 for m in (User, Patient, PasswordResetToken, AuditLog)}
+        first_flag_id = _max_id(conn, UserFlags) + 1
+        if is_pg and args.audit:
+            # Cover every month up to `end`, which may lie ahead of the current one: rows
+            # past the last partition would land in audit_logs_default, and Postgres then
+            # refuses to create that month's partition when maintenance gets there
+            start = end - timedelta(days=args.days)
+            now = datetime.utcnow()
+            months_ahead = max(0, (end.year - now.year) * 12 + end.month - now.month)
+            conn.execute(text("SELECT audit_logs_ensure_partitions(:n, :m)"),
+                         {"n": months_ahead, "m": start.date().replace(day=1)})
+
+    ctx = {
+        "password_hash": hash_password(args.password),  # one bcrypt, shared by every synthetic user
+        "role_ids": role_ids,
+        "end": end,
+        "days": max(1, args.days),
+        "user_ids": (first[User], args.staff),
+        "patient_ids": (first[Patient], args.patients),
+        # user_flags ids run alongside the new user ids, after any existing flags
+        "flag_offset": first_flag_id - first[User],
+    }
+
+    started = time.perf_counter()
+    with Pool(workers, initializer=_init_worker) as pool:
+        _load(pool, "users", gen_users, args.seed, first[User], args.staff, args.block_size, ctx)
+        _load(pool, "patients", gen_patients, args.seed, first[Patient], args.patients, args.block_size, ctx)
+        _load(pool, "password_reset_tokens", gen_tokens, args.seed, first[PasswordResetToken], args.tokens, args.block_size, ctx)
+        _load(pool, "audit_logs", gen_audit, args.seed, first[AuditLog], args.audit, args.block_size, ctx)
+
+    if is_pg:
+        # Explicit ids bypassed the sequences; move them past the generated rows
+        with engine.begin() as conn:
+            for table in ("users", "user_flags", "patients", "password_reset_tokens", "audit_logs"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+            conn.execute(text("ANALYZE"))
+    print(f"Done in {time.perf_counter() - started:.1f}s with {workers} worker(s).")
+
+
+if __name__ == "__main__":
+    main()
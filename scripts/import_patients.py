@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Stream a patient census into the patients table.
+
+  python scripts/import_patients.py census.csv [--job-id census-2026] [--chunk-size 5000]
+  python scripts/import_patients.py census.ndjson.gz --format ndjson
+
+CSV needs a full_name column (medical_history optional); NDJSON has one object per
+line with the same keys; a .gz suffix is decompressed on the fly. Rows load in
+chunks (COPY on Postgres) and every chunk commits with a checkpoint, so re-running
+the same command after a failure resumes where it stopped (--restart starts over).
+Rejected records go to <file>.rejects.ndjson with their record number and reason.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import config
+from app.database import SessionLocal
+from app.crud.patient_import import FORMATS, ImportFormatError, import_patients
+
+
+def _guess_format(path: str) -> str:
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FORMATS, help='default: from the file extension')
+    parser.add_argument('--job-id', help='checkpoint name (default: the file name)')
+    parser.add_argument('--chunk-size', type=int, default=config.PATIENT_IMPORT_CHUNK_SIZE)
+    parser.add_argument('--rejects', help='where to write rejected records (default: <path>.rejects.ndjson)')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    args = parser.parse_args()
+
+    fmt = args.format or _guess_format(args.path)
+    job_id = args.job_id or os.path.basename(args.path)
+    opener = gzip.open if args.path.endswith('.gz') else open
+    started = time.perf_counter()
+
+    def on_progress(summary):
+        done = summary['records'] - summary['resumed_from']
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        print(f"{summary['records']} records ({summary['imported']} imported, {summary['rejected']} rejected), "
+              f"{rate:,.0f} records/s", file=sys.stderr)
+
+    db = SessionLocal()
+    with opener(args.path, 'rt', encoding='utf-8-sig', newline='') as src, \
+            open(args.rejects or args.path + '.rejects.ndjson', 'a', encoding='utf-8') as rejects:
+        def on_reject(record_no, reason, record):
+            rejects.write(json.dumps({'record': record_no, 'reason': reason, 'data': record}, default=str) + '\n')
+
+        try:
+            summary = import_patients(
+                db, src, fmt, job_id, source=os.path.abspath(args.path), chunk_size=args.chunk_size,
+                restart=args.restart, on_progress=on_progress, on_reject=on_reject,
+            )
+        except ImportFormatError as exc:
+            print(f"Import stopped: {exc}. Fix the file and re-run to resume.", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            db.close()
+
+    if summary['resumed_from'] and summary['resumed_from'] == summary['records']:
+        print(f"Job {job_id} had already finished; nothing loaded (use --restart to load again).")
+    elif summary['resumed_from']:
+        print(f"Resumed after record {summary['resumed_from']}.")
+    print(f"Job {job_id}: {summary['imported']} imported, {summary['rejected']} rejected "
+          f"in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == '__main__':
+    main()
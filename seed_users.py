@@ -1,9 +1,8 @@
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal
 from app.models.user import User, Role
 from app.core.security import hash_password
 
-# 1. Initialize tables (Integrity)
-Base.metadata.create_all(bind=engine)
+# 1. Tables come from Alembic: run `alembic upgrade head` first (Integrity)
 
 def seed_system():
     db = SessionLocal()
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+# Register every table with the metadata before creating the schema
+import app.models.password_reset  # noqa: F401
+import app.models.patient_import  # noqa: F401
+import app.models.user_flags  # noqa: F401
+from app.core.security import create_access_token
+from app.crud.break_glass import grant_cache
+from app.crud.patient import patient_cache
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.audit import AuditLog
+from app.models.break_glass import BreakGlassGrant
+from app.models.patient import Patient
+from app.models.user import Role
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    db = SessionLocal()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def admin_headers():
+    token = create_access_token({"sub": "test_admin", "role": "Admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def role_id(db):
+    """role_id("Doctor") -> id of that role, created if missing."""
+    def _get(name: str) -> int:
+        role = db.query(Role).filter(Role.role_name == name).first()
+        if not role:
+            role = Role(role_name=name)
+            db.add(role); db.commit(); db.refresh(role)
+        return role.id
+    return _get
+
+
+@pytest.fixture
+def make_patients(db):
+    """make_patients("A", "B") -> ids of new patients; removed with their audit rows and grants afterwards."""
+    created = []
+
+    def _make(*names, medical_history="notes"):
+        patients = [Patient(full_name=name, medical_history=medical_history) for name in names]
+        db.add_all(patients)
+        db.commit()
+        created.extend(p.id for p in patients)
+        return [p.id for p in patients]
+
+    yield _make
+    db.query(AuditLog).filter(AuditLog.resource_id.in_([str(pid) for pid in created])).delete(synchronize_session=False)
+    db.query(BreakGlassGrant).filter(BreakGlassGrant.patient_id.in_(created)).delete(synchronize_session=False)
+    db.query(Patient).filter(Patient.id.in_(created)).delete(synchronize_session=False)
+    db.commit()
+    for pid in created:
+        patient_cache.invalidate(pid)
+    grant_cache.clear()
@@ -0,0 +1,56 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core import config
+from app.models.audit import AuditLog
+
+ACTION = "EXPORT_TEST"
+
+
+@pytest.fixture
+def audit_rows(db):
+    db.query(AuditLog).filter(AuditLog.action.like(f"{ACTION}%")).delete(synchronize_session=False)
+    db.add_all(
+        AuditLog(action=f"{ACTION}: {i}", resource_id=str(i), ip_address="10.0.0.1", timestamp=datetime(2026, 5, 1, 8, i))
+        for i in range(7)
+    )
+    db.commit()
+    yield
+    db.query(AuditLog).filter(AuditLog.action.like(f"{ACTION}%") | (AuditLog.action == "AUDIT_EXPORT: test_admin")).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(config, "AUDIT_EXPORT_BATCH_SIZE", 3)  # several chunks through the compressor
+
+
+def test_ndjson_export_gzip(client, admin_headers, audit_rows):
+    r = client.get("/admin/audit-logs/export", params={"action": ACTION, "compress": "gzip"}, headers=admin_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/gzip"
+    assert r.headers["content-disposition"] == 'attachment; filename="audit_logs.ndjson.gz"'
+    rows = [json.loads(line) for line in gzip.decompress(r.content).decode().splitlines()]
+    assert [row["resource_id"] for row in rows] == [str(i) for i in range(7)]  # oldest first
+    assert rows[0]["timestamp"] == "2026-05-01T08:00:00"
+
+
+def test_csv_export_gzip_matches_plain(client, admin_headers, audit_rows):
+    params = {"action": ACTION, "format": "csv"}
+    plain = client.get("/admin/audit-logs/export", params=params, headers=admin_headers)
+    packed = client.get("/admin/audit-logs/export", params={**params, "compress": "gzip"}, headers=admin_headers)
+    assert packed.headers["content-disposition"] == 'attachment; filename="audit_logs.csv.gz"'
+    assert gzip.decompress(packed.content) == plain.content
+
+    rows = list(csv.DictReader(io.StringIO(plain.text)))
+    assert len(rows) == 7 and rows[-1]["action"] == f"{ACTION}: 6"
+
+
+def test_export_requires_admin_and_valid_options(client, admin_headers):
+    assert client.get("/admin/audit-logs/export", params={"compress": "zip"}, headers=admin_headers).status_code == 422
+    assert client.get("/admin/audit-logs/export").status_code == 401
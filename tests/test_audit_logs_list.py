@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func
+
+from app.core.security import hash_password
+from app.crud.audit import encode_audit_cursor
+from app.crud.user import create_user
+from app.models.audit import AuditLog
+from app.models.user import User
+from app.models.user_flags import UserFlags
+
+ACTION = "AUDIT_PAGE_TEST"
+USERNAME = "audit_page_test"
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username) == USERNAME)]
+    db.query(AuditLog).filter(AuditLog.action.like(f"{ACTION}%")).delete(synchronize_session=False)
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def entries(db, role_id):
+    """Seven rows, oldest first; rows 2-4 share a timestamp so the id breaks the tie."""
+    _cleanup(db)
+    user = create_user(db, USERNAME, "pw", role_id("Doctor"), hashed_password=hash_password("pw", rounds=4))
+    hours = [8, 9, 10, 10, 10, 11, 12]
+    rows = [
+        AuditLog(action=f"{ACTION}: {'view' if i % 2 else 'edit'} {i}", user_id=user.id if i < 4 else None,
+                 resource_id=str(i), ip_address="10.1.1.1", timestamp=datetime(2026, 5, 1, h))
+        for i, h in enumerate(hours)
+    ]
+    db.add_all(rows)
+    db.commit()
+    yield user, [r.id for r in rows]
+    _cleanup(db)
+
+
+def _page(client, headers, **params):
+    r = client.get("/admin/audit-logs", params={"action": ACTION, **params}, headers=headers)
+    assert r.status_code == 200
+    return r.json(), r.headers.get("X-Next-Cursor")
+
+
+def test_pages_newest_first_without_gaps_or_duplicates(client, admin_headers, entries):
+    _, ids = entries
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = _page(client, admin_headers, limit=2, **({"cursor": cursor} if cursor else {}))
+        pages += 1
+        seen += [row["id"] for row in rows]
+        if cursor is None:
+            break
+        last = rows[-1]
+        assert cursor == encode_audit_cursor(datetime.fromisoformat(last["timestamp"]), last["id"])
+
+    assert pages == 4
+    assert seen == ids[::-1]  # (timestamp, id) descending, ties by id
+
+
+def test_exact_final_page_has_no_cursor(client, admin_headers, entries):
+    rows, cursor = _page(client, admin_headers, limit=7)
+    assert len(rows) == 7 and cursor is None
+
+
+def test_filters(client, admin_headers, entries):
+    user, ids = entries
+    rows, _ = _page(client, admin_headers, user_id=user.id)
+    assert [r["id"] for r in rows] == ids[3::-1]
+
+    rows, _ = _page(client, admin_headers, action=f"{ACTION}: view")  # prefix match
+    assert [r["id"] for r in rows] == [ids[5], ids[3], ids[1]]
+
+    # since inclusive, until exclusive; offsets are converted to UTC
+    rows, _ = _page(client, admin_headers, since="2026-05-01T12:00:00+02:00", until="2026-05-01T11:00:00Z")
+    assert [r["id"] for r in rows] == ids[4:1:-1]
+
+    rows, _ = _page(client, admin_headers, resource_id="6", ip_address="10.1.1.1")
+    assert [r["id"] for r in rows] == [ids[6]]
+
+
+def test_cursor_resumes_inside_a_timestamp_tie(client, admin_headers, entries):
+    _, ids = entries
+    rows, _ = _page(client, admin_headers, cursor=encode_audit_cursor(datetime(2026, 5, 1, 10), ids[3]))
+    assert [r["id"] for r in rows] == [ids[2], ids[1], ids[0]]
+
+
+@pytest.mark.parametrize("cursor", ["__4", "bm90LWEtY3Vyc29y", "MjAyNi0wNS0wMXx4"])
+def test_malformed_cursor_is_400(client, admin_headers, cursor):
+    r = client.get("/admin/audit-logs", params={"cursor": cursor}, headers=admin_headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
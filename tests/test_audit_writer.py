@@ -0,0 +1,122 @@
+from app.database import SessionLocal, engine, Base
+from app.models.audit import AuditLog
+import app.models.user  # noqa: F401  audit_logs.user_id references users
+from app.crud.audit import AuditWriter, log_event
+import app.crud.audit as audit_crud
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+Base.metadata.create_all(bind=engine)
+
+
+def test_batched_writer_flushes_queued_events():
+    db = SessionLocal()
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_TEST%')).delete(synchronize_session=False)
+    db.commit()
+
+    writer = AuditWriter(SessionLocal, batch_size=10, flush_interval_ms=50, max_queue=100)
+    original = audit_crud.audit_writer
+    audit_crud.audit_writer = writer
+    try:
+        writer.start()
+        for i in range(25):
+            log_event(db, None, f'WRITER_TEST: {i}', ip_address='127.0.0.1')
+        writer.flush()
+        assert db.query(AuditLog).filter(AuditLog.action.like('WRITER_TEST%')).count() == 25
+        assert writer.written == 25
+    finally:
+        writer.stop()
+        audit_crud.audit_writer = original
+
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_TEST%')).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def test_full_queue_falls_back_to_inline_write():
+    db = SessionLocal()
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_FULL%')).delete(synchronize_session=False)
+    db.commit()
+
+    # A writer that is "running" but never drains: the second event must be written inline
+    writer = AuditWriter(SessionLocal, batch_size=10, flush_interval_ms=50, max_queue=1)
+    writer.submit({'user_id': None, 'action': 'WRITER_FULL: queued', 'resource_id': None, 'ip_address': None, 'timestamp': datetime.utcnow()})
+    assert writer.submit({'action': 'WRITER_FULL: overflow'}) is False
+    assert writer.overflowed == 1
+    writer.flush()
+    assert db.query(AuditLog).filter(AuditLog.action == 'WRITER_FULL: queued').count() == 1
+
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_FULL%')).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def _failing_sessions(should_fail):
+    """Session factory whose audit INSERTs raise while should_fail(rows) is true."""
+    def factory():
+        db = SessionLocal()
+        execute = db.execute
+
+        def flaky_execute(statement, params=None, *args, **kwargs):
+            if isinstance(params, list) and should_fail(params):
+                raise OperationalError('INSERT INTO audit_logs', {}, Exception('connection lost'))
+            return execute(statement, params, *args, **kwargs)
+
+        db.execute = flaky_execute
+        return db
+    return factory
+
+
+def test_failed_flush_is_retried_then_written_row_by_row():
+    db = SessionLocal()
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_RETRY%')).delete(synchronize_session=False)
+    db.commit()
+
+    # The batch fails on the first attempt and on the retry; rows then go in one by one,
+    # except the poisoned one, which is the only event lost
+    attempts = []
+    def should_fail(rows):
+        attempts.append(len(rows))
+        return len(rows) > 1 or rows[0]['action'] == 'WRITER_RETRY: poison'
+
+    writer = AuditWriter(_failing_sessions(should_fail), batch_size=10, flush_interval_ms=50, max_queue=100)
+    writer.retry_delay = 0
+    now = datetime.utcnow()
+    for action in ('WRITER_RETRY: 1', 'WRITER_RETRY: poison', 'WRITER_RETRY: 2'):
+        writer.submit({'user_id': None, 'action': action, 'resource_id': None, 'ip_address': None, 'timestamp': now})
+    writer.flush()
+
+    assert attempts == [3, 3, 1, 1, 1]
+    assert writer.written == 2 and writer.failed == 1
+    written = {a for (a,) in db.query(AuditLog.action).filter(AuditLog.action.like('WRITER_RETRY%'))}
+    assert written == {'WRITER_RETRY: 1', 'WRITER_RETRY: 2'}
+
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_RETRY%')).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def test_transient_flush_failure_loses_nothing():
+    db = SessionLocal()
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_BLIP%')).delete(synchronize_session=False)
+    db.commit()
+
+    failures = [1]  # the first INSERT fails, the retry succeeds
+    def should_fail(rows):
+        return bool(failures) and failures.pop() == 1
+
+    writer = AuditWriter(_failing_sessions(should_fail), batch_size=10, flush_interval_ms=50, max_queue=100)
+    writer.retry_delay = 0
+    writer.start()
+    try:
+        for i in range(5):
+            writer.submit({'user_id': None, 'action': f'WRITER_BLIP: {i}', 'resource_id': None,
+                           'ip_address': None, 'timestamp': datetime.utcnow()})
+        writer.flush()
+    finally:
+        writer.stop()
+    assert writer.failed == 0
+    assert db.query(AuditLog).filter(AuditLog.action.like('WRITER_BLIP%')).count() == 5
+
+    db.query(AuditLog).filter(AuditLog.action.like('WRITER_BLIP%')).delete(synchronize_session=False)
+    db.commit()
+    db.close()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from app.api import patients
+
+from app.crud.break_glass import grant_cache
+from app.models.audit import AuditLog
+from app.models.break_glass import BreakGlassGrant
+
+USER_ID = 1  # the patients router's placeholder user
+
+
+def _break_glass(client, pid, reason="ER"):
+    r = client.post(f"/patients/{pid}/break-glass", params={"reason": reason})
+    assert r.status_code == 200
+    return r.json()
+
+
+def _grants(db, pid):
+    return db.query(BreakGlassGrant).filter(BreakGlassGrant.patient_id == pid).all()
+
+
+def test_grant_is_issued_once_then_served_from_cache(client, db, make_patients):
+    (pid,) = make_patients("Glass One")
+    first = _break_glass(client, pid)
+    assert first["data"]["full_name"] == "Glass One"
+    assert grant_cache.get((USER_ID, pid))["id"] == first["grant"]["id"]
+
+    second = _break_glass(client, pid, reason="still ER")
+    assert second["grant"] == first["grant"]
+    assert len(_grants(db, pid)) == 1
+
+    actions = [a for (a,) in db.query(AuditLog.action).filter(AuditLog.resource_id == str(pid)).order_by(AuditLog.id)]
+    assert actions == ["BREAK-GLASS: ER", f"BREAK-GLASS-ACCESS (grant {first['grant']['id']}): still ER"]
+
+
+def test_active_grant_is_reloaded_after_a_cache_miss(client, db, make_patients):
+    (pid,) = make_patients("Glass Two")
+    grant_id = _break_glass(client, pid)["grant"]["id"]
+    grant_cache.clear()  # e.g. another worker issued it
+
+    assert _break_glass(client, pid)["grant"]["id"] == grant_id
+    assert grant_cache.get((USER_ID, pid)) is not None
+    assert len(_grants(db, pid)) == 1
+
+
+def test_expired_grant_is_replaced(client, db, make_patients):
+    (pid,) = make_patients("Glass Three")
+    old_id = _break_glass(client, pid)["grant"]["id"]
+    grant = db.get(BreakGlassGrant, old_id)
+    grant.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    grant_cache.clear()
+
+    new = _break_glass(client, pid)["grant"]
+    assert new["id"] != old_id
+    db.expire_all()
+    assert sorted((g.id, g.active) for g in _grants(db, pid)) == [(old_id, False), (new["id"], True)]
+
+
+def test_concurrent_first_requests_share_one_grant(client, db, make_patients, monkeypatch):
+    (pid,) = make_patients("Glass Four")
+    first = _break_glass(client, pid)["grant"]
+    grant_cache.clear()
+
+    # This request's lookup ran before the other one committed its grant
+    async def no_grant_yet(db, user_id, patient_id):
+        return None
+    monkeypatch.setattr(patients, "get_active_grant", no_grant_yet)
+
+    assert _break_glass(client, pid, reason="also ER")["grant"] == first
+    assert len(_grants(db, pid)) == 1
+    last = db.query(AuditLog.action).filter(AuditLog.resource_id == str(pid)).order_by(AuditLog.id.desc()).first()
+    assert last.action == f"BREAK-GLASS-ACCESS (grant {first['id']}): also ER"
+
+
+def test_unknown_patient_is_404_and_audited(client, db):
+    missing = "987654321"
+    try:
+        assert client.post(f"/patients/{missing}/break-glass", params={"reason": "ER"}).status_code == 404
+        assert [a for (a,) in db.query(AuditLog.action).filter(AuditLog.resource_id == missing)] == ["BREAK-GLASS: ER"]
+    finally:
+        db.query(AuditLog).filter(AuditLog.resource_id == missing).delete(synchronize_session=False)
+        db.commit()
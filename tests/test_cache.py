@@ -0,0 +1,26 @@
+import time
+from app.core.cache import TTLCache
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' is now most recently used
+    cache.set('c', 3)           # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1 and stats['evictions'] == 1
+
+
+def test_entries_expire_and_can_be_invalidated():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('short', 'x', ttl=0.01)
+    cache.set('long', {'id': 7})
+    time.sleep(0.02)
+    assert cache.get('short') is None
+    cache.invalidate_where(lambda v: v['id'] == 7)
+    assert cache.get('long') is None
+    cache.set('never', 'x', ttl=0)
+    assert len(cache) == 0
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import func
+
+from app.core import config, security
+from app.core.security import hash_password
+from app.crud.user import create_user
+from app.models.audit import AuditLog
+from app.models.user import User
+from app.models.user_flags import UserFlags
+
+USERNAME = "kdf_busy_test"
+
+
+class _FullSlots:
+    """Every KDF slot taken: _run_kdf refuses at once."""
+
+    def acquire(self, blocking=True):
+        return False
+
+
+def _audit_rows(db):
+    return db.query(AuditLog).filter(AuditLog.action.like(f"%{USERNAME}%")).count()
+
+
+@pytest.fixture
+def user(db, role_id):
+    def _cleanup():
+        ids = [u.id for u in db.query(User).filter(func.lower(User.username) == USERNAME)]
+        db.query(AuditLog).filter(AuditLog.user_id.in_(ids) | AuditLog.action.like(f"%{USERNAME}%")).delete(synchronize_session=False)
+        db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+
+    _cleanup()
+    yield create_user(db, USERNAME, "pw-1", role_id("Doctor"), hashed_password=hash_password("pw-1", rounds=4))
+    _cleanup()
+
+
+def test_saturated_pool_gives_503_with_retry_after(client, db, user, monkeypatch):
+    monkeypatch.setattr(config, "KDF_RETRY_AFTER_SECONDS", 3)
+    monkeypatch.setattr(security, "_kdf_slots", _FullSlots())
+
+    r = client.post("/auth/login", json={"username": USERNAME, "password": "pw-1"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "3"
+    assert r.json() == {"detail": "Authentication service busy, please retry"}
+    # Not the user's failure: nothing is audited as a failed login
+    assert _audit_rows(db) == 0
+    assert db.query(AuditLog).filter(AuditLog.user_id == user.id).count() == 0
+
+
+def test_saturated_pool_on_registration(client, admin_headers, role_id, monkeypatch):
+    role_id("Doctor")
+    monkeypatch.setattr(security, "_kdf_slots", _FullSlots())
+    r = client.post("/admin/register-user", headers=admin_headers,
+                    json={"username": USERNAME + "_new", "password": "pw", "role_name": "Doctor"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == str(config.KDF_RETRY_AFTER_SECONDS)
+
+
+def test_slot_is_released_after_each_hash(client, user):
+    free = security._kdf_slots._value
+    assert client.post("/auth/login", json={"username": USERNAME, "password": "wrong"}).status_code == 401
+    assert security._kdf_slots._value == free
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import func
+
+from app.core.security import hash_password
+from app.crud.user import create_user, encode_user_cursor
+from app.models.user import User
+from app.models.user_flags import UserFlags
+
+PREFIX = "page_test_"
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username).like(f"{PREFIX}%"))]
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def users(db, role_id):
+    _cleanup(db)
+    hashed = hash_password("pw", rounds=4)
+    names = [f"{PREFIX}{i:02d}" for i in range(5)]
+    for i, name in enumerate(names):
+        create_user(db, name, "pw", role_id("Nurse" if i == 2 else "Doctor"), hashed_password=hashed)
+    yield names
+    _cleanup(db)
+
+
+def test_cursor_round_trip_until_the_last_page(client, admin_headers, users):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"username_prefix": PREFIX, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/admin/users", params=params, headers=admin_headers)
+        assert r.status_code == 200
+        pages += 1
+        seen += [u["username"] for u in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        assert cursor == encode_user_cursor(seen[-1])
+
+    assert pages == 3
+    assert seen == users
+    assert r.json() == [{"id": r.json()[0]["id"], "username": users[-1], "role_name": "Doctor",
+                         "must_change_password": False}]
+
+
+def test_exact_final_page_has_no_cursor(client, admin_headers, users):
+    r = client.get("/admin/users", params={"username_prefix": PREFIX, "limit": 5}, headers=admin_headers)
+    assert [u["username"] for u in r.json()] == users
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_filters_and_bad_cursor(client, admin_headers, users):
+    r = client.get("/admin/users", params={"username_prefix": PREFIX, "role": "Nurse"}, headers=admin_headers)
+    assert [u["username"] for u in r.json()] == [users[2]]
+
+    r = client.get("/admin/users", params={"username_prefix": PREFIX, "cursor": encode_user_cursor(users[3])},
+                   headers=admin_headers)
+    assert [u["username"] for u in r.json()] == [users[4]]
+
+    # not UTF-8 once decoded
+    assert client.get("/admin/users", params={"cursor": "__4"}, headers=admin_headers).status_code == 400
@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+import app.models.password_reset  # noqa: F401
+import app.models.user_flags  # noqa: F401
+from app.api import auth
+from app.core import ratelimit, security
+from app.core.ratelimit import InMemoryRateLimitBackend, LoginThrottle
+from app.core.security import hash_password
+from app.crud.user import create_user
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.audit import AuditLog
+from app.models.user import Role, User
+from app.models.user_flags import UserFlags
+
+Base.metadata.create_all(bind=engine)
+
+client = TestClient(app)
+USERNAME = "throttle_test"
+
+
+@pytest.fixture
+def user():
+    db = SessionLocal()
+    role = db.query(Role).filter(Role.role_name == "Doctor").first()
+    if not role:
+        role = Role(role_name="Doctor")
+        db.add(role); db.commit(); db.refresh(role)
+    _cleanup(db)
+    # Low-cost hash so failed attempts are quick; a success rehashes it in the background
+    user = create_user(db, USERNAME, "right-pw", role.id, hashed_password=hash_password("right-pw", rounds=4))
+    yield user
+    _cleanup(db)
+    db.close()
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username) == USERNAME)]
+    db.query(AuditLog).filter(AuditLog.user_id.in_(ids) | AuditLog.action.like(f"%{USERNAME}%")).delete(synchronize_session=False)
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def throttle(monkeypatch):
+    def _make(window=300.0, per_username=3, per_ip=100):
+        t = LoginThrottle(InMemoryRateLimitBackend(), window=window, per_username=per_username, per_ip=per_ip)
+        monkeypatch.setattr(auth, "login_throttle", t)
+        monkeypatch.setattr(auth.config, "LOGIN_RATE_LIMIT_ENABLED", True)
+        return t
+    return _make
+
+
+def _login(password, username=USERNAME):
+    return client.post("/auth/login", json={"username": username, "password": password})
+
+
+class _FullSlots:
+    def acquire(self, blocking=True):
+        return False
+
+
+def test_failed_attempts_over_the_limit_get_429(user, throttle):
+    t = throttle(per_username=3)
+    assert [_login("wrong").status_code for _ in range(3)] == [401, 401, 401]
+
+    r = _login("right-pw")
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    assert t.stats()["rejected_username"] == 1
+
+
+def test_successful_logins_do_not_use_up_the_budget(user, throttle):
+    throttle(per_username=2)
+    assert [_login("right-pw").status_code for _ in range(4)] == [200] * 4
+    assert _login("wrong").status_code == 401
+
+
+def test_locked_account_does_not_use_up_the_ip_budget(user, throttle):
+    t = throttle(per_username=2, per_ip=4)
+    _login("wrong"); _login("wrong")
+    assert [_login("wrong").status_code for _ in range(5)] == [429] * 5
+
+    # Two of the four IP attempts are left for everyone else behind this address
+    assert [_login("pw", username=f"{USERNAME}_nobody{i}").status_code for i in range(3)] == [401, 401, 429]
+    assert (t.rejected_username, t.rejected_ip) == (5, 1)
+
+
+def test_saturated_hashing_pool_does_not_count(user, throttle, monkeypatch):
+    throttle(per_username=2)
+    slots = security._kdf_slots
+    assert _login("wrong").status_code == 401
+
+    monkeypatch.setattr(security, "_kdf_slots", _FullSlots())
+    assert [_login("wrong").status_code for _ in range(3)] == [503] * 3
+
+    monkeypatch.setattr(security, "_kdf_slots", slots)
+    assert _login("wrong").status_code == 401  # the 503s were given back
+    assert _login("wrong").status_code == 429
+
+
+def test_limit_resets_after_the_window(user, throttle, monkeypatch):
+    clock = SimpleNamespace(now=3000.0)
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(time=lambda: clock.now))
+    throttle(window=300, per_username=2)
+    _login("wrong"); _login("wrong")
+    assert _login("wrong").status_code == 429
+
+    clock.now += 300  # start of the next window: the previous count still weighs in fully
+    assert _login("wrong").status_code == 429
+    clock.now += 150  # halfway through it: only half of the previous count is left
+    assert _login("wrong").status_code == 401
+
+
+def test_in_memory_backend_sliding_window():
+    backend = InMemoryRateLimitBackend()
+
+    async def scenario():
+        assert [await backend.hit("k", 2, 60) for _ in range(2)] == [0.0, 0.0]
+        assert 0 < await backend.hit("k", 2, 60) <= 60
+        await backend.refund("k", 60)
+        assert await backend.hit("k", 2, 60) == 0.0
+        assert await backend.hit("other", 2, 60) == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_in_memory_backend_sweeps_idle_keys():
+    backend = InMemoryRateLimitBackend(max_keys=2)
+
+    async def scenario():
+        await backend.hit("a", 5, 0.05)
+        await asyncio.sleep(0.11)
+        await backend.hit("b", 5, 0.05)
+        await backend.hit("c", 5, 0.05)
+
+    asyncio.run(scenario())
+    assert "a" not in backend._windows
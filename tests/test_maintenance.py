@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func
+
+import app.models.user_flags  # noqa: F401
+from app.core import config
+from app.core.maintenance import MaintenanceScheduler
+from app.core.security import hash_password
+from app.crud.password_reset import purge_expired
+from app.database import Base, SessionLocal, engine
+from app.models.password_reset import PasswordResetToken
+from app.models.user import Role, User
+
+Base.metadata.create_all(bind=engine)
+
+USERNAME = "purge_test"
+PREFIX = "purge-test-"
+
+
+@pytest.fixture
+def db():
+    db = SessionLocal()
+    role = db.query(Role).filter(Role.role_name == "Doctor").first()
+    if not role:
+        role = Role(role_name="Doctor")
+        db.add(role); db.commit(); db.refresh(role)
+    _cleanup(db)
+    user = User(username=USERNAME, hashed_password=hash_password("pw", rounds=4), role_id=role.id)
+    db.add(user); db.commit(); db.refresh(user)
+    db.info["user_id"] = user.id
+    yield db
+    _cleanup(db)
+    db.close()
+
+
+def _cleanup(db):
+    db.query(PasswordResetToken).filter(PasswordResetToken.token_hash.like(f"{PREFIX}%")).delete(synchronize_session=False)
+    db.query(User).filter(func.lower(User.username) == USERNAME).delete(synchronize_session=False)
+    db.commit()
+
+
+def _tokens(db, expired=0, used=0, live=0):
+    now = datetime.utcnow()
+    rows = (
+        [{"expires_at": now - timedelta(hours=1)}] * expired
+        + [{"expires_at": now + timedelta(hours=1), "used_at": now}] * used
+        + [{"expires_at": now + timedelta(hours=1)}] * live
+    )
+    db.add_all(
+        PasswordResetToken(user_id=db.info["user_id"], token_hash=f"{PREFIX}{i}", **row)
+        for i, row in enumerate(rows)
+    )
+    db.commit()
+
+
+def _remaining(db):
+    return db.query(PasswordResetToken).filter(PasswordResetToken.token_hash.like(f"{PREFIX}%")).count()
+
+
+def test_purge_expired_deletes_dead_tokens_in_batches(db):
+    _tokens(db, expired=5, used=2, live=2)
+
+    assert purge_expired(db, batch_size=3, max_batches=1) == 3
+    assert _remaining(db) == 6
+
+    assert purge_expired(db, batch_size=3) == 4  # a full batch, then a short one ends the loop
+    assert _remaining(db) == 2
+    assert purge_expired(db, batch_size=3) == 0
+
+
+def test_scheduler_runs_jobs_and_records_failures():
+    scheduler = MaintenanceScheduler(lambda: engine, SessionLocal, tick_seconds=1, lock_key=1)
+    scheduler.add_job("ok", lambda db: 4, 60)
+    scheduler.add_job("broken", lambda db: 1 / 0, 60)
+    assert scheduler._acquire_leadership()
+    for job in scheduler._jobs:
+        scheduler.run_job(job)
+
+    jobs = scheduler.stats()["jobs"]
+    assert (jobs["ok"]["runs"], jobs["ok"]["rows_total"], jobs["ok"]["failures"]) == (1, 4, 0)
+    assert jobs["broken"]["failures"] == 1 and "ZeroDivisionError" in jobs["broken"]["last_error"]
+
+
+def test_no_leader_behind_a_transaction_pooler(monkeypatch):
+    pg = create_engine("postgresql://nobody@127.0.0.1:1/none")  # never connected to
+    monkeypatch.setattr(config, "DB_POOL_MODE", "null")
+    scheduler = MaintenanceScheduler(lambda: pg, SessionLocal, tick_seconds=1, lock_key=1)
+    assert not scheduler._acquire_leadership()
+    assert not scheduler.is_leader
@@ -0,0 +1,86 @@
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.middleware.metrics import MetricsMiddleware
+
+_SAMPLE = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+
+
+def _scrape(client) -> dict:
+    """{(metric name, frozenset of label pairs): value} from the /metrics text."""
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for line in r.text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = _SAMPLE.match(line).groups()
+        pairs = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels or ""))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def _value(samples, name, **labels):
+    return samples.get((name, frozenset(labels.items())), 0.0)
+
+
+def test_requests_are_labelled_by_route_template(client, make_patients):
+    a, b = make_patients("Metrics A", "Metrics B")
+    before = _scrape(client)
+    client.get(f"/patients/{a}")
+    client.get(f"/patients/{b}")
+    client.get("/patients/987654321")  # 404 from a matched route
+    client.get("/no/such/path")
+    after = _scrape(client)
+
+    def delta(name, **labels):
+        return _value(after, name, **labels) - _value(before, name, **labels)
+
+    route = "/patients/{patient_id}"
+    assert delta("http_requests_total", method="GET", route=route, status="200") == 2
+    assert delta("http_requests_total", method="GET", route=route, status="404") == 1
+    assert delta("http_requests_total", method="GET", route="<unmatched>", status="404") == 1
+    # No per-id series
+    assert not any(f"/patients/{a}" in dict(pairs).get("route", "") for _, pairs in after)
+
+    # Cache misses ran one SELECT each, attributed to the request that ran it
+    assert delta("http_request_db_queries_count", method="GET", route=route) == 3
+    assert delta("http_request_db_queries_sum", method="GET", route=route) >= 3
+    assert delta("http_request_db_seconds_sum", method="GET", route=route) > 0
+    assert delta("http_request_duration_seconds_count", method="GET", route=route) == 3
+    assert _value(after, "http_requests_in_flight") == 1  # the scrape itself
+
+
+def test_metrics_endpoint_counts_itself_under_its_own_route(client):
+    first = _scrape(client)
+    second = _scrape(client)
+    labels = {"method": "GET", "route": "/metrics", "status": "200"}
+    # A scrape is recorded once it has been served, so it shows up in the next one
+    assert _value(second, "http_requests_total", **labels) == _value(first, "http_requests_total", **labels) + 1
+    assert _value(second, "http_request_db_queries_sum", method="GET", route="/metrics") == 0
+
+
+def test_unhandled_errors_count_as_500():
+    app = FastAPI()
+
+    @app.get("/boom/{n}")
+    async def boom(n: int):
+        raise RuntimeError("boom")
+
+    app.add_middleware(MetricsMiddleware)
+    key = ("GET", "/boom/{n}", "500")
+    before = metrics.http_requests.values.get(key, 0)
+    r = TestClient(app, raise_server_exceptions=False).get("/boom/1")
+    assert r.status_code == 500
+    assert metrics.http_requests.values[key] == before + 1
+    assert "RuntimeError" not in metrics.render()  # the error itself never becomes a label
+
+
+def test_render_escapes_label_values():
+    counter = metrics.Counter("test_total", "Escaping.", ("route",))
+    counter.inc(('/a"b\\c\nd',))
+    assert list(counter.render())[-1] == 'test_total{route="/a\\"b\\\\c\\nd"} 1'
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import func
+
+from app.core import config
+from app.core.security import hash_password, hash_rounds, needs_rehash, verify_password
+from app.crud.user import create_user, rehash_password
+from app.models.audit import AuditLog
+from app.models.user import User
+from app.models.user_flags import UserFlags
+
+USERNAME = "rehash_test"
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username) == USERNAME)]
+    db.query(AuditLog).filter(AuditLog.user_id.in_(ids) | AuditLog.action.like(f"%{USERNAME}%")).delete(synchronize_session=False)
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def user(db, role_id, monkeypatch):
+    monkeypatch.setattr(config, "BCRYPT_ROUNDS", 5)  # cheap, but above the stored cost
+    _cleanup(db)
+    user = create_user(db, USERNAME, "pw-1", role_id("Doctor"), hashed_password=hash_password("pw-1", rounds=4))
+    yield user
+    _cleanup(db)
+
+
+def _stored_hash(db, user_id):
+    db.expire_all()
+    return db.get(User, user_id).hashed_password
+
+
+def test_needs_rehash_compares_with_the_configured_cost(monkeypatch):
+    monkeypatch.setattr(config, "BCRYPT_ROUNDS", 5)
+    assert hash_rounds("$2b$12$abcdefghijklmnopqrstuv") == 12
+    assert hash_rounds("not-a-bcrypt-hash") is None
+    assert needs_rehash(hash_password("x", rounds=4))
+    assert needs_rehash(hash_password("x", rounds=6))  # downgrades too
+    assert not needs_rehash(hash_password("x"))
+
+
+def test_login_upgrades_a_lower_cost_hash(client, db, user):
+    r = client.post("/auth/login", json={"username": USERNAME, "password": "pw-1"})
+    assert r.status_code == 200
+
+    upgraded = _stored_hash(db, user.id)  # the background task ran before TestClient returned
+    assert hash_rounds(upgraded) == 5
+    assert verify_password("pw-1", upgraded)
+
+    assert client.post("/auth/login", json={"username": USERNAME, "password": "pw-1"}).status_code == 200
+    assert _stored_hash(db, user.id) == upgraded  # already at cost: left alone
+
+
+def test_failed_login_does_not_rehash(client, db, user):
+    old = _stored_hash(db, user.id)
+    assert client.post("/auth/login", json={"username": USERNAME, "password": "wrong"}).status_code == 401
+    assert _stored_hash(db, user.id) == old
+
+
+def test_rehash_does_not_overwrite_a_concurrent_password_change(db, user):
+    seen_at_login = _stored_hash(db, user.id)
+    # The password is reset between the login's read and the background rehash
+    changed = hash_password("pw-2", rounds=4)
+    db.query(User).filter(User.id == user.id).update({User.hashed_password: changed})
+    db.commit()
+
+    assert rehash_password(db, user.id, seen_at_login, hash_password("pw-1")) is False
+    assert _stored_hash(db, user.id) == changed
+
+    assert rehash_password(db, user.id, changed, hash_password("pw-2")) is True
+    assert verify_password("pw-2", _stored_hash(db, user.id))
@@ -0,0 +1,37 @@
+from app.core import config
+from app.models.audit import AuditLog
+
+
+def test_batch_keeps_request_order_and_lists_missing(client, db, make_patients):
+    a, b, c = make_patients("Batch A", "Batch B", "Batch C")
+    client.get(f"/patients/{b}")  # one cached record among the misses
+    ghost = 987654321
+
+    r = client.post("/patients/batch", json={"ids": [c, ghost, a, c, b]})
+    assert r.status_code == 200
+    body = r.json()
+    assert [p["id"] for p in body["patients"]] == [c, a, b]
+    assert [p["full_name"] for p in body["patients"]] == ["Batch C", "Batch A", "Batch B"]
+    assert body["missing"] == [ghost]
+
+    views = db.query(AuditLog.resource_id).filter(
+        AuditLog.action == "PATIENT_VIEW", AuditLog.resource_id.in_([str(a), str(b), str(c), str(ghost)])
+    )
+    assert sorted(int(rid) for (rid,) in views) == sorted([a, b, c])
+
+
+def test_batch_query_form(client, make_patients):
+    a, b = make_patients("Batch Q1", "Batch Q2")
+    r = client.get(f"/patients/batch?ids={b},{a}&ids=0")
+    assert [p["id"] for p in r.json()["patients"]] == [b, a]
+    assert r.json()["missing"] == [0]
+
+
+def test_batch_limits(client, monkeypatch):
+    assert client.post("/patients/batch", json={"ids": []}).status_code == 422
+    assert client.get("/patients/batch?ids=1,x").status_code == 422
+    monkeypatch.setattr(config, "PATIENT_BATCH_MAX", 2)
+    ghosts = [987654321, 987654322, 987654323]
+    assert client.post("/patients/batch", json={"ids": ghosts}).status_code == 422
+    r = client.post("/patients/batch", json={"ids": [ghosts[0], ghosts[0], ghosts[1]]})  # duplicates count once
+    assert r.status_code == 200 and r.json() == {"patients": [], "missing": ghosts[:2]}
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from app.crud.patient import patient_cache
+from app.models.patient import Patient
+
+
+def test_conditional_get_returns_304(client, make_patients):
+    (pid,) = make_patients("Etag Test")
+    r = client.get(f"/patients/{pid}")
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "private, no-cache"
+    assert r.json()["full_name"] == "Etag Test"
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        r = client.get(f"/patients/{pid}", headers={"If-None-Match": header})
+        assert r.status_code == 304
+        assert r.content == b""
+        assert r.headers["ETag"] == etag
+
+    r = client.get(f"/patients/{pid}", headers={"If-None-Match": '"p0-0"'})
+    assert r.status_code == 200 and r.json()["id"] == pid
+
+
+def test_update_changes_the_etag(client, db, make_patients):
+    (pid,) = make_patients("Etag Update")
+    etag = client.get(f"/patients/{pid}").headers["ETag"]
+    assert patient_cache.get(pid) is not None
+
+    patient = db.get(Patient, pid)
+    patient.medical_history = "updated"
+    patient.updated_at = datetime(2026, 1, 2, 3, 4, 5)
+    db.commit()
+    assert patient_cache.get(pid) is None  # invalidated on commit
+
+    r = client.get(f"/patients/{pid}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.headers["Last-Modified"] == "Fri, 02 Jan 2026 03:04:05 GMT"
+    assert r.json()["medical_history"] == "updated"
+
+
+def test_unknown_patient_is_404(client):
+    assert client.get("/patients/987654321").status_code == 404
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from app.core import config
+from app.crud.patient_import import ImportFormatError, import_patients
+from app.models.audit import AuditLog
+from app.models.patient import Patient
+from app.models.patient_import import PatientImport
+
+NAME = "Import Test"
+JOB = "import-test-"
+
+
+@pytest.fixture(autouse=True)
+def cleanup(db, monkeypatch):
+    monkeypatch.setattr(config, "PATIENT_IMPORT_CHUNK_SIZE", 2)
+
+    def _cleanup():
+        db.query(Patient).filter(Patient.full_name.like(f"{NAME}%")).delete(synchronize_session=False)
+        db.query(PatientImport).filter(PatientImport.job_id.like(f"{JOB}%")).delete(synchronize_session=False)
+        db.query(AuditLog).filter(AuditLog.resource_id.like(f"{JOB}%")).delete(synchronize_session=False)
+        db.commit()
+
+    _cleanup()
+    yield
+    _cleanup()
+
+
+def _names(db):
+    return sorted(name for (name,) in db.query(Patient.full_name).filter(Patient.full_name.like(f"{NAME}%")))
+
+
+def test_upload_reports_rejects_and_is_not_loaded_twice(client, db, admin_headers):
+    body = (
+        "full_name,medical_history\n"
+        f"{NAME} 1,asthma\n"
+        ",no name\n"
+        f"{NAME} 2,\n"
+        f"  {NAME} 3  ,x\n"
+    ).encode()
+    url = f"/admin/patient-import?job_id={JOB}csv"
+    r = client.post(url, content=body, headers=admin_headers)
+    assert r.status_code == 200
+    assert r.json() == {"job_id": f"{JOB}csv", "status": "done", "records": 4, "imported": 3, "rejected": 1,
+                        "resumed_from": 0, "rejects": [{"record": 2, "reason": "full_name is required"}]}
+    assert _names(db) == [f"{NAME} 1", f"{NAME} 2", f"{NAME} 3"]
+
+    again = client.post(url, content=body, headers=admin_headers).json()
+    assert (again["imported"], again["resumed_from"]) == (3, 4)
+    assert len(_names(db)) == 3
+
+    status = client.get(f"/admin/patient-import/{JOB}csv", headers=admin_headers).json()
+    assert (status["status"], status["records"]) == ("done", 4)
+    assert client.get(f"/admin/patient-import/{JOB}nope", headers=admin_headers).status_code == 404
+
+
+def test_ndjson_import_resumes_from_the_checkpoint(db):
+    # Record 3 is long enough that the undecodable byte after it is past the first read
+    good = "".join(f'{{"full_name": "{NAME} {i}", "medical_history": "{"x" * 5000 * i}"}}\n' for i in range(1, 4)).encode()
+    broken = good + b'{"full_name": "\xff"}\n' + f'{{"full_name": "{NAME} 5"}}\n'.encode()
+
+    with pytest.raises(ImportFormatError):
+        import_patients(db, io.TextIOWrapper(io.BytesIO(broken), encoding="utf-8"), "ndjson", JOB + "nd", chunk_size=2)
+    assert _names(db) == [f"{NAME} 1", f"{NAME} 2"]  # only the committed chunk
+    assert db.get(PatientImport, JOB + "nd").records == 2
+
+    fixed = good + f'{{"full_name": "{NAME} 4"}}\nnot json\n{{"full_name": "{NAME} 5"}}\n'.encode()
+    summary = import_patients(db, io.TextIOWrapper(io.BytesIO(fixed), encoding="utf-8"), "ndjson", JOB + "nd",
+                              chunk_size=2)
+    assert summary == {"job_id": JOB + "nd", "status": "done", "records": 6, "imported": 5, "rejected": 1,
+                       "resumed_from": 2}
+    assert _names(db) == [f"{NAME} {i}" for i in range(1, 6)]
@@ -0,0 +1,54 @@
+from sqlalchemy.dialects import postgresql
+
+from app.crud.patient import patient_search_select
+from app.database import Base, SessionLocal, engine
+from app.models.patient import Patient
+
+Base.metadata.create_all(bind=engine)
+
+PREFIX = "Zq_search "
+
+
+def test_prefix_search_binds_an_escaped_literal_pattern():
+    compiled = patient_search_select("O'Br_1%").compile(dialect=postgresql.dialect())
+    assert "||" not in str(compiled)
+    assert list(compiled.params.values()) == ["O'Br\\_1\\%%"]
+    assert 'ORDER BY lower(patients.full_name) COLLATE "C", patients.id' in str(compiled)
+
+
+def test_prefix_search_matches_wildcards_literally():
+    db = SessionLocal()
+    names = [PREFIX + "a_b", PREFIX + "axb", PREFIX + "A%c", "x" + PREFIX]
+    db.add_all(Patient(full_name=n) for n in names)
+    db.commit()
+    try:
+        def search(q):
+            return [row.full_name for row in db.execute(patient_search_select(q, dialect=engine.dialect.name))]
+
+        assert sorted(search(PREFIX.lower())) == sorted(names[:3])
+        assert search(PREFIX + "a_") == [PREFIX + "a_b"]
+        assert search(PREFIX + "a%") == [PREFIX + "A%c"]
+    finally:
+        db.query(Patient).filter(Patient.full_name.in_(names)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_prefix_search_pages_in_case_insensitive_order():
+    db = SessionLocal()
+    names = [PREFIX + "bb", PREFIX + "Ab", PREFIX + "aa", PREFIX + "BA"]
+    db.add_all(Patient(full_name=n) for n in names)
+    db.commit()
+    try:
+        def page(after=None):
+            stmt = patient_search_select(PREFIX, dialect=engine.dialect.name, after=after).limit(2)
+            return [(row.full_name, row.id) for row in db.execute(stmt)]
+
+        first = page()
+        second = page(after=first[-1])
+        assert [name for name, _ in first + second] == [PREFIX + "aa", PREFIX + "Ab", PREFIX + "BA", PREFIX + "bb"]
+        assert page(after=second[-1]) == []
+    finally:
+        db.query(Patient).filter(Patient.full_name.in_(names)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import func, update
+
+import app.models.password_reset  # noqa: F401
+from app.core.security import hash_password
+from app.crud.user import create_user, get_login_principal, principal_cache
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.audit import AuditLog
+from app.models.user import Role, User
+from app.models.user_flags import UserFlags
+
+Base.metadata.create_all(bind=engine)
+
+client = TestClient(app)
+USERNAME = "principal_test"
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username) == USERNAME)]
+    db.query(AuditLog).filter(AuditLog.user_id.in_(ids) | AuditLog.action.like(f"%{USERNAME}%")).delete(synchronize_session=False)
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def test_cached_principal_never_serves_a_stale_password():
+    db = SessionLocal()
+    role = db.query(Role).filter(Role.role_name == "Doctor").first()
+    if not role:
+        role = Role(role_name="Doctor")
+        db.add(role); db.commit(); db.refresh(role)
+    _cleanup(db)
+    try:
+        user = create_user(db, USERNAME, "old-pw", role.id, hashed_password=hash_password("old-pw", rounds=4))
+        principal, hashed = get_login_principal(db, USERNAME)
+        assert principal.id == user.id and principal.role_name == "Doctor"
+        assert "hashed_password" not in principal._fields
+        assert principal_cache.get(USERNAME) == principal
+
+        # Another worker changes the password: nothing invalidates this process's cache
+        db.execute(update(User).where(User.id == user.id).values(hashed_password=hash_password("new-pw", rounds=4)))
+        db.commit()
+        assert client.post("/auth/login", json={"username": USERNAME, "password": "old-pw"}).status_code == 401
+        assert client.post("/auth/login", json={"username": USERNAME, "password": "new-pw"}).status_code == 200
+
+        # A cached principal whose user is gone is dropped, not returned
+        _cleanup(db)
+        assert get_login_principal(db, USERNAME) == (None, None)
+        assert principal_cache.get(USERNAME) is None
+    finally:
+        _cleanup(db)
+        db.close()
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.query_diagnostics import (
+    QueryBudgetExceeded, attach_query_diagnostics, capture_queries, fingerprint,
+)
+
+
+def test_fingerprint_collapses_literals_and_lists():
+    assert fingerprint("SELECT * FROM t WHERE id = 42 AND name = 'x'") == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?)") == fingerprint("SELECT * FROM t WHERE id IN (?)")
+
+
+def test_capture_flags_repeats_and_enforces_budget():
+    engine = create_engine("sqlite://")
+    attach_query_diagnostics(engine)
+    with engine.connect() as conn:
+        with capture_queries("loop") as log:
+            for i in range(5):
+                conn.execute(text(f"SELECT {i}"))
+        assert log.count == 5
+        assert [(shape, n) for shape, n, _, _ in log.repeated(threshold=5)] == [("SELECT ?", 5)]
+
+        with pytest.raises(QueryBudgetExceeded):
+            with capture_queries("budget", budget=1):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+        with capture_queries("outside", budget=0, strict=False) as log:
+            conn.execute(text("SELECT 1"))
+        assert log.count == 1
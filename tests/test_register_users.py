@@ -0,0 +1,124 @@
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import func
+
+from app.api import admin
+from app.core.security import hash_password, verify_password
+from app.crud.user import create_user
+from app.models.audit import AuditLog
+from app.models.user import User
+from app.models.user_flags import UserFlags
+
+PREFIX = "bulk_test_"
+
+
+def _load_reset_script():
+    path = os.path.join(os.path.dirname(__file__), "..", "scripts", "admin_reset_user.py")
+    spec = importlib.util.spec_from_file_location("admin_reset_user", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username).like(f"{PREFIX}%"))]
+    db.query(AuditLog).filter(AuditLog.user_id.in_(ids) | AuditLog.action.like(f"%{PREFIX}%")).delete(synchronize_session=False)
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def existing(db, role_id):
+    _cleanup(db)
+    user = create_user(db, PREFIX + "taken", "pw", role_id("Doctor"), hashed_password=hash_password("pw", rounds=4))
+    yield user
+    _cleanup(db)
+
+
+def _usernames(db):
+    return sorted(u.username for u in db.query(User).filter(User.username.like(f"{PREFIX}%")))
+
+
+def test_bulk_register_reports_every_row(client, db, admin_headers, existing):
+    rows = [
+        {"username": PREFIX + "new1", "password": "pw-1", "role_name": "Doctor"},
+        {"username": PREFIX.upper() + "TAKEN", "password": "pw-2", "role_name": "Doctor"},
+        {"username": PREFIX + "new1", "password": "pw-3", "role_name": "Doctor"},
+        {"username": PREFIX + "new2", "password": "pw-4", "role_name": "No such role"},
+        {"username": PREFIX + "new3", "role_name": "Doctor"},
+    ]
+    r = client.post("/admin/register-users", json={"users": rows}, headers=admin_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["created"], body["failed"]) == (1, 4)
+    assert [(res["row"], res["status"]) for res in body["results"]] == [
+        (0, "created"), (1, "error"), (2, "error"), (3, "error"), (4, "error"),
+    ]
+    assert [res.get("detail") for res in body["results"][1:4]] == [
+        "Username already exists", "Duplicate username in batch", "Role does not exist",
+    ]
+    assert _usernames(db) == [PREFIX + "new1", PREFIX + "taken"]
+
+
+def test_bulk_register_from_csv(client, db, admin_headers, existing):
+    csv_body = (
+        "﻿username,password,role_name\r\n"
+        f"{PREFIX}csv1,pw-1,Doctor\r\n"
+        f" {PREFIX}csv2 ,pw-2,Doctor\r\n"
+    )
+    r = client.post("/admin/register-users", content=csv_body.encode(),
+                    headers={**admin_headers, "Content-Type": "text/csv"})
+    assert r.status_code == 200
+    assert r.json()["created"] == 2
+    assert _usernames(db) == [PREFIX + "csv1", PREFIX + "csv2", PREFIX + "taken"]
+
+    user = db.query(User).filter(User.username == PREFIX + "csv2").one()
+    assert verify_password("pw-2", user.hashed_password)
+    assert db.query(UserFlags).filter(UserFlags.user_id == user.id).count() == 1
+
+
+def test_bulk_register_conflict_creates_nobody(client, db, admin_headers, existing, monkeypatch):
+    # A concurrent registration takes a name after the pre-check: the insert fails as a whole
+    monkeypatch.setattr(admin, "_bulk_lookups", lambda db, usernames, roles: (set(), {"Doctor": existing.role_id}))
+    rows = [
+        {"username": PREFIX + "fresh", "password": "pw-1", "role_name": "Doctor"},
+        {"username": PREFIX + "taken", "password": "pw-2", "role_name": "Doctor"},
+    ]
+    r = client.post("/admin/register-users", json=rows, headers=admin_headers)
+    assert r.status_code == 409
+    assert _usernames(db) == [PREFIX + "taken"]
+
+
+def test_bulk_register_rejects_bad_bodies(client, admin_headers):
+    assert client.post("/admin/register-users", json=[], headers=admin_headers).status_code == 422
+    assert client.post("/admin/register-users", content=b"{nope", headers=admin_headers).status_code == 400
+    assert client.post("/admin/register-users", json={"users": []},
+                       headers={"Authorization": "Bearer nope"}).status_code == 401
+
+
+def test_admin_reset_user_bulk(db, existing, tmp_path):
+    script = _load_reset_script()
+    other = create_user(db, PREFIX + "other", "pw", existing.role_id, hashed_password=hash_password("pw", rounds=4))
+    path = tmp_path / "resets.csv"
+    path.write_text(
+        "username,temporary_password\n"
+        f"{PREFIX.upper()}TAKEN,temporary-1\n"
+        f"{PREFIX}other,temporary-2\n"
+        f"{PREFIX}short,short\n"
+        f"{PREFIX}ghost,temporary-3\n",
+        encoding="utf-8",
+    )
+
+    errors = script.reset_users(db, script.read_resets(str(path)))
+
+    assert errors == [(PREFIX + "short", "temporary password shorter than 8 characters"),
+                      (PREFIX + "ghost", "user not found")]
+    db.expire_all()
+    for user, password in ((existing, "temporary-1"), (other, "temporary-2")):
+        stored = db.get(User, user.id)
+        assert verify_password(password, stored.hashed_password)
+        assert db.query(UserFlags).filter(UserFlags.user_id == user.id).one().must_change_password
+    assert db.query(AuditLog).filter(AuditLog.action == f"PASSWORD_ADMIN_RESET: {PREFIX}taken").count() == 1
@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.core.security import hash_password
+from app.crud.password_reset import create_reset_token
+from app.crud.user import create_user, get_login_principal
+from app.crud.user_flags import get_flags, set_must_change
+from app.models.audit import AuditLog
+from app.models.password_reset import PasswordResetToken
+from app.models.user import User
+from app.models.user_flags import UserFlags
+
+USERNAME = "reset_flag_test"
+
+
+def _cleanup(db):
+    ids = [u.id for u in db.query(User).filter(func.lower(User.username) == USERNAME)]
+    db.query(AuditLog).filter(AuditLog.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(UserFlags).filter(UserFlags.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(PasswordResetToken).filter(PasswordResetToken.user_id.in_(ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def user(db, role_id):
+    _cleanup(db)
+    user = create_user(db, USERNAME, "temporary-pw", role_id("Doctor"), hashed_password=hash_password("temporary-pw", rounds=4))
+    yield user
+    _cleanup(db)
+
+
+def _reset(client, db, user, new_password="brand-new-pw"):
+    raw_token = "reset-flag-" + str(user.id)
+    create_reset_token(db, user.id, hashlib.sha256(raw_token.encode()).hexdigest(), datetime.utcnow() + timedelta(hours=1))
+    return client.post("/auth/reset-password", json={"token": raw_token, "new_password": new_password})
+
+
+def test_reset_clears_must_change_password(client, db, user):
+    set_must_change(db, user.id, True)
+    assert get_login_principal(db, USERNAME)[0].must_change_password  # now cached
+
+    assert _reset(client, db, user).status_code == 200
+
+    db.expire_all()
+    assert get_flags(db, user.id).must_change_password is False
+    assert get_login_principal(db, USERNAME)[0].must_change_password is False
+    assert db.query(PasswordResetToken).filter(PasswordResetToken.user_id == user.id).one().used_at is not None
+    r = client.post("/auth/login", json={"username": USERNAME, "password": "brand-new-pw"})
+    assert r.status_code == 200 and r.json()["must_change_password"] is False
+
+
+def test_reset_creates_missing_flags_row(client, db, user):
+    db.query(UserFlags).filter(UserFlags.user_id == user.id).delete(synchronize_session=False)
+    db.commit()
+
+    assert _reset(client, db, user).status_code == 200
+    db.expire_all()
+    assert get_flags(db, user.id).must_change_password is False